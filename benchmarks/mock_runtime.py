@@ -0,0 +1,304 @@
+"""
+In-process stand-ins for the pieces a workflow pattern needs at runtime.
+
+- MockChatClient: deterministic LLM with configurable latency and token rate
+- InMemoryStateStore: dict-backed state store holding workflow histories
+- WorkflowDriver: runs a `@workflow` generator the way the Dapr workflow
+  engine does, replaying it from the start against its recorded history
+  every time it resumes, and runs `@task` activities against the mock LLM
+  as soon as they are scheduled, so when_all and when_any both work
+
+Nothing here talks to a Dapr sidecar or an LLM provider.
+"""
+
+import asyncio
+import enum
+import hashlib
+import inspect
+import json
+import re
+import string
+import time
+import typing
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+
+def stable_hash(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+class MockChatClient:
+    """
+    Deterministic LLM stand-in.
+
+    Each call takes `latency_ms` plus `completion_tokens / tokens_per_second`.
+    Structured responses are built from the response_format's fields, seeded
+    by a hash of the prompt, so the same prompt always gets the same answer.
+    `title` fields echo the prompt's `## ` headings in order, the way a model
+    asked to review or rewrite titled sections would.
+    """
+
+    def __init__(self, latency_ms: float = 200, tokens_per_second: float = 500, completion_tokens: int = 150, list_length: int = 4):
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.list_length = list_length
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.total_completion_tokens = 0
+
+    async def generate(self, prompt: str, response_format: Any = None) -> Any:
+        self.calls += 1
+        self.prompt_tokens += len(prompt) // 4
+        self.total_completion_tokens += self.completion_tokens
+        await asyncio.sleep(self.latency_ms / 1000 + self.completion_tokens / self.tokens_per_second)
+        seed = stable_hash(prompt)
+        if response_format is None or response_format is str or response_format is inspect.Signature.empty:
+            return f"Mock response {seed:08x}: " + " ".join(["lorem"] * (self.completion_tokens // 2))
+        headings = re.findall(r"^## (.+)$", prompt, flags=re.MULTILINE)
+        return self._fake(response_format, seed, headings, iter(headings))
+
+    def _fake(self, annotation: Any, seed: int, headings: List[str], titles: Iterator[str]) -> Any:
+        origin = typing.get_origin(annotation)
+        if origin is typing.Union:
+            return self._fake(next(a for a in typing.get_args(annotation) if a is not type(None)), seed, headings, titles)
+        if origin in (list, List):
+            (item,) = typing.get_args(annotation) or (str,)
+            # One titled item per section in the prompt
+            titled = headings and inspect.isclass(item) and issubclass(item, BaseModel) and "title" in item.model_fields
+            length = len(headings) if titled else self.list_length
+            return [self._fake(item, seed + i, headings, titles) for i in range(length)]
+        if origin in (dict, Dict):
+            return {f"key{i}": f"value{seed + i:08x}" for i in range(self.list_length)}
+        if inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+            return annotation(**{
+                name: next(titles, None) or self._fake(info.annotation, seed + i, headings, titles)
+                if name == "title" else self._fake(info.annotation, seed + i, headings, titles)
+                for i, (name, info) in enumerate(annotation.model_fields.items())
+            })
+        if inspect.isclass(annotation) and issubclass(annotation, enum.Enum):
+            members = list(annotation)
+            return members[seed % len(members)]
+        if annotation is bool:
+            return seed % 3 == 0
+        if annotation is int:
+            return seed % 10 + 1
+        if annotation is float:
+            return (seed % 1000) / 100
+        return f"mock-{seed:08x}"
+
+
+class InMemoryStateStore:
+    """Dict-backed stand-in for a Dapr state store"""
+
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.writes = 0
+
+    def save_state(self, key: str, value: Any):
+        self.writes += 1
+        self.data[key] = value
+
+    def get_state(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+
+class MockTask:
+    """
+    Something a workflow scheduled: an activity, a child workflow or an
+    external event. Tasks are numbered in scheduling order, which is the
+    same on every replay, and that number ties them to their running job.
+    """
+
+    def __init__(self, seq: int, kind: str, target: Any, input: Any = None, instance_id: Optional[str] = None):
+        self.seq = seq
+        self.kind = kind
+        self.target = target
+        self.input = input
+        self.instance_id = instance_id
+        self._job: Optional[asyncio.Future] = None
+
+    def get_result(self) -> Any:
+        return self._job.result()
+
+    @property
+    def is_complete(self) -> bool:
+        return self._job.done()
+
+
+@dataclass(eq=False)
+class WhenAll:
+    tasks: List[MockTask]
+
+
+@dataclass(eq=False)
+class WhenAny:
+    tasks: List[MockTask]
+
+
+def when_all(tasks: List[MockTask]) -> WhenAll:
+    return WhenAll(list(tasks))
+
+
+def when_any(tasks: List[MockTask]) -> WhenAny:
+    return WhenAny(list(tasks))
+
+
+class MockWorkflowContext:
+    """Hands every scheduled task to the driver instead of sending it to a sidecar"""
+
+    def __init__(self, instance_id: str, current_utc_datetime: datetime, schedule: Callable[[MockTask], None]):
+        self.instance_id = instance_id
+        self.current_utc_datetime = current_utc_datetime
+        self.is_replaying = False
+        self._schedule = schedule
+        self._seq = 0
+
+    def _new_task(self, kind: str, target: Any, input: Any = None, instance_id: Optional[str] = None) -> MockTask:
+        task = MockTask(self._seq, kind, target, input, instance_id)
+        self._seq += 1
+        self._schedule(task)
+        return task
+
+    def call_activity(self, activity: Callable, input: Any = None) -> MockTask:
+        return self._new_task("activity", activity, input)
+
+    def call_child_workflow(self, workflow: Callable, *, input: Any = None, instance_id: Optional[str] = None) -> MockTask:
+        return self._new_task("child", workflow, input, instance_id)
+
+    def wait_for_external_event(self, name: str) -> MockTask:
+        # Nothing raises events here, so these never complete
+        return self._new_task("event", name)
+
+    def when_all(self, tasks: List[MockTask]) -> WhenAll:
+        return when_all(tasks)
+
+    def when_any(self, tasks: List[MockTask]) -> WhenAny:
+        return when_any(tasks)
+
+
+@dataclass
+class RunStats:
+    activities: int = 0
+    child_workflows: int = 0
+    history_events: int = 0
+    replayed_events: int = 0
+    replay_seconds: float = 0.0
+
+
+class WorkflowDriver:
+    """Run `@workflow` generators with Dapr-style replay against a mock LLM"""
+
+    def __init__(self, llm: MockChatClient, state_store: Optional[InMemoryStateStore] = None):
+        self.llm = llm
+        self.state_store = state_store or InMemoryStateStore()
+        self.stats = RunStats()
+        self._instances = 0
+
+    async def run(self, workflow: Callable, input: Any = None, instance_id: Optional[str] = None) -> Any:
+        self._instances += 1
+        instance_id = instance_id or f"instance-{self._instances}"
+        created_at = datetime.now(timezone.utc)
+        # What every await the workflow has passed resolved to, and when
+        history: List[Any] = []
+        # Tasks start when they are first scheduled and keep running across replays
+        jobs: Dict[int, asyncio.Future] = {}
+
+        def schedule(task: MockTask):
+            if task.seq not in jobs:
+                jobs[task.seq] = asyncio.ensure_future(self._start(task))
+            task._job = jobs[task.seq]
+
+        while True:
+            # Every resume replays the generator from the start, like the engine does,
+            # with the clock set to when each replayed result arrived
+            started = time.perf_counter()
+            ctx = MockWorkflowContext(instance_id, created_at, schedule)
+            ctx.is_replaying = bool(history)
+            gen = workflow(ctx, input) if input is not None else workflow(ctx)
+            try:
+                pending = next(gen)
+                for value, completed_at in history:
+                    self.stats.replayed_events += 1
+                    ctx.current_utc_datetime = completed_at
+                    pending = gen.send(self._resolve(pending, value))
+                ctx.is_replaying = False
+            except StopIteration as done:
+                self.stats.replay_seconds += time.perf_counter() - started
+                self.state_store.save_state(f"{instance_id}||history", history)
+                return done.value
+            self.stats.replay_seconds += time.perf_counter() - started
+
+            value = await self._wait(pending)
+            history.append((value, datetime.now(timezone.utc)))
+            self.state_store.save_state(f"{instance_id}||history", history)
+
+    @staticmethod
+    async def _wait(pending: Any) -> Any:
+        if isinstance(pending, WhenAll):
+            return list(await asyncio.gather(*[task._job for task in pending.tasks]))
+        if isinstance(pending, WhenAny):
+            await asyncio.wait([task._job for task in pending.tasks], return_when=asyncio.FIRST_COMPLETED)
+            # The earliest-scheduled finished task wins, so replays pick the same one
+            return min(task.seq for task in pending.tasks if task.is_complete)
+        if isinstance(pending, MockTask):
+            return await pending._job
+        raise TypeError(f"Workflow yielded unsupported value: {pending!r}")
+
+    @staticmethod
+    def _resolve(pending: Any, value: Any) -> Any:
+        # when_any hands back the winning task itself, not its result
+        if isinstance(pending, WhenAny):
+            return next(task for task in pending.tasks if task.seq == value)
+        return value
+
+    async def _start(self, task: MockTask) -> Any:
+        if task.kind == "event":
+            await asyncio.Event().wait()
+        # Each scheduled activity or child adds a scheduled and a completed event
+        self.stats.history_events += 2
+        if task.kind == "child":
+            self.stats.child_workflows += 1
+            return await self.run(task.target, task.input, task.instance_id)
+        self.stats.activities += 1
+        return await self._run_activity(task.target, task.input)
+
+    async def _run_activity(self, func: Callable, input: Any) -> Any:
+        kwargs = input if isinstance(input, dict) else ({} if input is None else None)
+        args = () if kwargs is not None else (input,)
+        result = func(*args, **coerce_inputs(func, kwargs or {}))
+
+        # `pass`-bodied @task functions are implemented by the LLM
+        if result is None:
+            description = getattr(func, "_task_description", None) or func.__doc__ or func.__name__
+            prompt = render(description, kwargs if kwargs is not None else {"input": input})
+            result = await self.llm.generate(prompt, inspect.signature(func).return_annotation)
+
+        # Activity results cross the sidecar as JSON
+        if isinstance(result, BaseModel):
+            result = result.model_dump(mode="json")
+        return json.loads(json.dumps(result, default=lambda o: o.model_dump(mode="json") if isinstance(o, BaseModel) else str(o)))
+
+
+def coerce_inputs(func: Callable, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild model-typed arguments from JSON, as the task wrapper does"""
+    coerced = dict(kwargs)
+    for name, param in inspect.signature(func).parameters.items():
+        if coerced.get(name) is None or param.annotation is inspect.Parameter.empty:
+            continue
+        try:
+            coerced[name] = TypeAdapter(param.annotation).validate_python(coerced[name])
+        except (ValidationError, TypeError):
+            pass
+    return coerced
+
+
+def render(template: str, values: Dict[str, Any]) -> str:
+    fields = {name for _, name, _, _ in string.Formatter().parse(template) if name}
+    prompt = template.format(**{name: values.get(name, "") for name in fields})
+    unused = {k: v for k, v in values.items() if k not in fields}
+    return f"{prompt}\n{json.dumps(unused, default=str)}" if unused else prompt
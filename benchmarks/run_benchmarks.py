@@ -0,0 +1,264 @@
+"""
+Benchmark the workflow patterns without a Dapr sidecar, Redis or an LLM key.
+
+Each scenario imports a pattern's real `@workflow` and `@task` functions and
+runs them through the replaying WorkflowDriver in mock_runtime.py, with every
+LLM-backed task answered by a deterministic MockChatClient. Variants of the
+same pattern (sequential vs parallel dispatch, sharding) are grouped so the
+speedup of each one shows up next to the baseline.
+
+    python run_benchmarks.py --instances 20 --latency-ms 200
+    python run_benchmarks.py --save-baseline baseline.json
+    python run_benchmarks.py --baseline baseline.json --tolerance 0.2
+
+With --baseline the run exits non-zero if any scenario's p50 latency or
+throughput regressed by more than the tolerance.
+
+augmented-llm and stateful-llm are single agents rather than workflows, so
+they have no scenario here.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import logging
+import os
+import sys
+import time
+import types
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import mock_runtime
+from mock_runtime import InMemoryStateStore, MockChatClient, WorkflowDriver
+
+ROOT = Path(__file__).resolve().parent.parent
+
+TICKETS = [
+    "My laptop won’t power on after the update.",
+    "The CRM app crashes whenever I click Save.",
+    "I cannot reach the corporate VPN from home.",
+    "How do I change my VPN password?",
+]
+
+CONFERENCE_REQUEST = (
+    "Plan a 2-day tech conference in San Francisco for 200 attendees, with keynote "
+    "and panel speakers on AI and Cloud and a detailed day-by-day schedule."
+)
+
+
+@dataclass
+class Scenario:
+    group: str
+    name: str
+    path: str
+    workflow: str
+    make_input: Callable[[int], Any]
+
+
+SCENARIOS = [
+    Scenario("chaining", "sequential", "patterns/chaining/app.py", "job_application_workflow",
+             lambda i: f"Applicant {i}: I'm applying for a software engineering role. I know Python and cloud."),
+    Scenario("routing", "sequential", "patterns/routing/app.py", "it_support_batch_workflow",
+             lambda i: [f"{t} (#{i}-{n})" for n, t in enumerate(TICKETS * 4)]),
+    Scenario("routing", "parallel", "patterns/routing/app.py", "it_support_parallel_batch_workflow",
+             lambda i: {"tickets": [f"{t} (#{i}-{n})" for n, t in enumerate(TICKETS * 4)], "max_per_category": 5}),
+    Scenario("routing", "sharded", "patterns/routing/app.py", "it_support_sharded_workflow",
+             lambda i: {"tickets": [f"{t} (#{i}-{n})" for n, t in enumerate(TICKETS * 4)], "shard_size": 4}),
+    Scenario("orchestrator", "sequential", "patterns/orchestrator/app.py", "conference_planning_workflow",
+             lambda i: {"request": f"{CONFERENCE_REQUEST} (#{i})", "dispatch_mode": "sequential"}),
+    Scenario("orchestrator", "parallel", "patterns/orchestrator/app.py", "conference_planning_workflow",
+             lambda i: {"request": f"{CONFERENCE_REQUEST} (#{i})", "dispatch_mode": "parallel", "max_in_flight": 5}),
+    Scenario("evaluator", "sequential", "patterns/evaluator/app.py", "recipe_refinement_workflow",
+             lambda i: {"request": f"A healthy vegan breakfast recipe (#{i})",
+                        "criteria": "high protein, low sugar, easy ingredients", "max_iterations": 3}),
+    Scenario("evaluator", "parallel", "patterns/evaluator/app.py", "parallel_recipe_refinement_workflow",
+             lambda i: {"request": f"A healthy vegan breakfast recipe (#{i})",
+                        "criteria": "high protein, low sugar, easy ingredients", "max_iterations": 3,
+                        "candidates": 3, "score_threshold": 9}),
+    Scenario("evaluator", "incremental", "patterns/evaluator/app.py", "incremental_recipe_refinement_workflow",
+             lambda i: {"request": f"A healthy vegan breakfast recipe (#{i})",
+                        "criteria": "high protein, low sugar, easy ingredients", "max_iterations": 3}),
+    Scenario("movie-night", "parallel", "lessons/llm-workflows/movie_night_planner.py", "movie_night_workflow",
+             lambda i: None),
+    Scenario("recipe-builder", "sequential", "lessons/llm-workflows/recipe_builder.py", "recipe_builder_workflow",
+             lambda i: None),
+]
+
+_modules: Dict[str, types.ModuleType] = {}
+
+
+def load_workflow(scenario: Scenario) -> Callable:
+    """Import a pattern's module from its file and point it at the mock runtime"""
+    if scenario.path not in _modules:
+        path = ROOT / scenario.path
+        # Patterns import their helper modules (llm_clients, response_cache) by bare name
+        sys.path.insert(0, str(path.parent))
+        module_name = "bench_" + scenario.path.replace("/", "_").replace("-", "_").removesuffix(".py")
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        for name in ("when_all", "when_any"):
+            if hasattr(module, name):
+                setattr(module, name, getattr(mock_runtime, name))
+        # movie_night_planner calls `wfapp.when_all`, with wfapp created under __main__
+        module.wfapp = types.SimpleNamespace(when_all=mock_runtime.when_all)
+        _modules[scenario.path] = module
+    return getattr(_modules[scenario.path], scenario.workflow)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_scenario(scenario: Scenario, args) -> Dict[str, Any]:
+    workflow = load_workflow(scenario)
+    llm = MockChatClient(
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        list_length=args.list_length,
+    )
+    driver = WorkflowDriver(llm, InMemoryStateStore())
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    iterations: List[int] = []
+    # Token estimates a workflow reports for each of its iterations
+    iteration_tokens: List[List[int]] = []
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await driver.run(workflow, scenario.make_input(i), instance_id=f"{scenario.group}-{scenario.name}-{i}")
+            latencies.append(time.perf_counter() - started)
+            # Refinement loops report how many iterations they ran
+            if isinstance(result, dict) and "iterations" in result:
+                iterations.append(result["iterations"])
+            if isinstance(result, dict) and "tokens_per_iteration" in result:
+                iteration_tokens.append(result["tokens_per_iteration"])
+
+    started = time.perf_counter()
+    # Patterns print every ticket and draft; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*[one(i) for i in range(args.instances)])
+    elapsed = time.perf_counter() - started
+
+    stats = driver.stats
+    tokens = llm.prompt_tokens + llm.total_completion_tokens
+    return {
+        "group": scenario.group,
+        "name": scenario.name,
+        "instances": args.instances,
+        "throughput_per_s": args.instances / elapsed,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p99_ms": 1000 * percentile(latencies, 99),
+        "activities": stats.activities / args.instances,
+        "child_workflows": stats.child_workflows / args.instances,
+        "llm_calls": llm.calls / args.instances,
+        "tokens": tokens / args.instances,
+        "iterations": sum(iterations) / len(iterations) if iterations else None,
+        "tokens_per_iteration": tokens / sum(iterations) if iterations else None,
+        "tokens_by_iteration": [
+            sum(run[i] for run in iteration_tokens if len(run) > i) / sum(1 for run in iteration_tokens if len(run) > i)
+            for i in range(max(map(len, iteration_tokens), default=0))
+        ],
+        "history_events": stats.history_events / args.instances,
+        "replayed_events": stats.replayed_events / args.instances,
+        "replay_ms": 1000 * stats.replay_seconds / args.instances,
+    }
+
+
+def print_report(results: List[Dict[str, Any]]):
+    header = (f"{'scenario':30s} {'wf/s':>8s} {'p50 ms':>9s} {'p99 ms':>9s} {'speedup':>8s} "
+              f"{'acts':>6s} {'llm':>6s} {'tokens':>8s} {'iters':>6s} {'tok/iter':>9s} {'events':>7s} {'replayed':>9s} {'replay ms':>10s}")
+    print(header)
+    print("-" * len(header))
+    baselines: Dict[str, float] = {}
+    for r in results:
+        # The first variant in each group is the one the others are compared to
+        baselines.setdefault(r["group"], r["p50_ms"])
+        speedup = baselines[r["group"]] / r["p50_ms"] if r["p50_ms"] else 0.0
+        iters = f"{r['iterations']:6.1f}" if r.get("iterations") is not None else f"{'-':>6s}"
+        per_iter = f"{r['tokens_per_iteration']:9.0f}" if r.get("tokens_per_iteration") is not None else f"{'-':>9s}"
+        print(f"{r['group'] + '/' + r['name']:30s} {r['throughput_per_s']:8.2f} {r['p50_ms']:9.1f} {r['p99_ms']:9.1f} "
+              f"{speedup:7.2f}x {r['activities']:6.1f} {r['llm_calls']:6.1f} {r['tokens']:8.0f} {iters} {per_iter} "
+              f"{r['history_events']:7.0f} {r['replayed_events']:9.0f} {r['replay_ms']:10.2f}")
+    for r in results:
+        if r.get("tokens_by_iteration"):
+            by_iteration = ", ".join(f"{tokens:.0f}" for tokens in r["tokens_by_iteration"])
+            print(f"\n{r['group'] + '/' + r['name']}: estimated tokens by iteration [{by_iteration}]", end="")
+    print("\n\nColumns are per workflow instance, except wf/s. 'tok/iter' is the mock LLM's tokens divided")
+    print("by the iterations a refinement workflow reports. 'replayed' counts the results fed back")
+    print("into the generator on resume; it grows with the square of the number of awaits.")
+
+
+def compare_to_baseline(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    with open(baseline_path) as f:
+        baseline = {(r["group"], r["name"]): r for r in json.load(f)}
+    regressions = []
+    for r in results:
+        before = baseline.get((r["group"], r["name"]))
+        if before is None:
+            continue
+        if r["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{r['group']}/{r['name']}: p50 {before['p50_ms']:.1f} -> {r['p50_ms']:.1f} ms")
+        if r["throughput_per_s"] < before["throughput_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{r['group']}/{r['name']}: throughput {before['throughput_per_s']:.2f} -> {r['throughput_per_s']:.2f} wf/s"
+            )
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark workflow patterns against a mock LLM.")
+    parser.add_argument("--instances", type=int, default=10, help="Workflow instances per scenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="Instances running at once")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Mock LLM time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=500, help="Mock LLM generation rate")
+    parser.add_argument("--completion-tokens", type=int, default=150, help="Tokens in every mock reply")
+    parser.add_argument("--list-length", type=int, default=4, help="Items in every list the mock LLM returns")
+    parser.add_argument("--only", nargs="*", help="Run only these patterns, e.g. routing orchestrator")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a JSON file written by --save-baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression, as a fraction")
+    args = parser.parse_args()
+
+    # The patterns build their LLM clients at import time; they are never called
+    os.environ.setdefault("OPENAI_API_KEY", "mock-key")
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("console").disabled = True
+
+    scenarios = [s for s in SCENARIOS if not args.only or s.group in args.only]
+    for scenario in scenarios:
+        load_workflow(scenario)
+    # Pattern modules turn on INFO logging when they are imported
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = [await run_scenario(scenario, args) for scenario in scenarios]
+
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
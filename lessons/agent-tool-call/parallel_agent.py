@@ -0,0 +1,127 @@
+from dapr_agents import Agent
+from dapr_agents.types import AgentError, ToolExecutionRecord, ToolMessage
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pydantic import Field, ValidationError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Shared, bounded pool for sync @tool functions
+tool_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tool")
+
+class ParallelToolAgent(Agent):
+    """
+    Agent that runs every tool call from one assistant turn concurrently.
+
+    Async tools run on the event loop, sync tools on a bounded thread pool.
+    Sibling calls to a tool listed in `batch_tools` are validated against
+    the tool's args_model and coalesced into a single batch invocation;
+    calls that don't validate run on their own and fail individually. Tool
+    messages are returned in the order the LLM emitted the tool calls, and
+    are printed, added to memory and recorded in `tool_history` like the
+    base Agent does. A failing tool call raises AgentError.
+    """
+
+    batch_tools: Dict[str, Callable[[List[dict]], List[Any]]] = Field(
+        default_factory=dict,
+        description="Tool name -> function taking a list of validated argument dicts and returning one result per call",
+    )
+
+    async def execute_tools(self, tool_calls: List[Any]) -> List[ToolMessage]:
+        logger.info(f"Running {len(tool_calls)} tool calls concurrently")
+
+        # Group sibling calls to batch-capable tools whose arguments validate;
+        # everything else runs on its own, so a bad call only fails itself
+        groups: Dict[str, List[Tuple[Any, dict]]] = {}
+        for tool_call in tool_calls:
+            if tool_call.function.name in self.batch_tools:
+                args = self._validate_for_batch(tool_call)
+                if args is not None:
+                    groups.setdefault(tool_call.function.name, []).append((tool_call, args))
+        batches = {name: calls for name, calls in groups.items() if len(calls) > 1}
+        batched_ids = {tool_call.id for calls in batches.values() for tool_call, _ in calls}
+        singles = [tool_call for tool_call in tool_calls if tool_call.id not in batched_ids]
+
+        # Like the base Agent, the first failing call raises AgentError
+        results = await asyncio.gather(
+            *[self._run_batch(name, calls) for name, calls in batches.items()],
+            *[self._run_tool_call(tool_call) for tool_call in singles],
+        )
+        by_id: Dict[str, Tuple[dict, str]] = {}
+        for result in results:
+            by_id.update(result)
+
+        tool_messages = []
+        for tool_call in tool_calls:
+            args, result = by_id[tool_call.id]
+            tool_message = ToolMessage(tool_call_id=tool_call.id, name=tool_call.function.name, content=result)
+            self.text_formatter.print_message(tool_message)
+            self.memory.add_message(tool_message)
+            self.tool_history.append(ToolExecutionRecord(
+                tool_call_id=tool_call.id,
+                tool_name=tool_call.function.name,
+                tool_args=args,
+                execution_result=result,
+            ))
+            tool_messages.append(tool_message)
+        return tool_messages
+
+    def _validate_for_batch(self, tool_call) -> Optional[dict]:
+        """Arguments checked against the tool's args_model, or None if they don't validate"""
+        agent_tool = self.tool_executor.get_tool(tool_call.function.name)
+        try:
+            args = json.loads(tool_call.function.arguments or "{}")
+            if agent_tool is not None and agent_tool.args_model is not None:
+                args = agent_tool.args_model(**args).model_dump()
+            return args
+        except (json.JSONDecodeError, TypeError, ValidationError) as e:
+            logger.info(f"Not batching {tool_call.function.name} call {tool_call.id}: {e}")
+            return None
+
+    async def _run_batch(self, name: str, calls: List[Tuple[Any, dict]]) -> Dict[str, Tuple[dict, str]]:
+        logger.info(f"Coalescing {len(calls)} calls to {name} into one batch")
+        tool_calls = [tool_call for tool_call, _ in calls]
+        args = [call_args for _, call_args in calls]
+        try:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(tool_pool, self.batch_tools[name], args)
+            if len(results) != len(args):
+                raise ValueError(f"returned {len(results)} results for {len(args)} calls")
+        except Exception as e:
+            logger.error(f"Error executing batch tool {name}: {e}")
+            raise AgentError(f"Error executing tool '{name}': {e}") from e
+        return {
+            tool_call.id: (call_args, to_content(result))
+            for tool_call, call_args, result in zip(tool_calls, args, results)
+        }
+
+    async def _run_tool_call(self, tool_call) -> Dict[str, Tuple[dict, str]]:
+        name = tool_call.function.name
+        args = self._parse_arguments(tool_call)
+        agent_tool = self.tool_executor.get_tool(name)
+        if agent_tool is None:
+            raise AgentError(f"Error executing tool '{name}': tool not found")
+        try:
+            if agent_tool._is_async:
+                result = await agent_tool.arun(**args)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(tool_pool, partial(agent_tool.run, **args))
+        except Exception as e:
+            logger.error(f"Error executing tool {name}: {e}")
+            raise AgentError(f"Error executing tool '{name}': {e}") from e
+        return {tool_call.id: (args, to_content(result))}
+
+    @staticmethod
+    def _parse_arguments(tool_call) -> dict:
+        try:
+            return json.loads(tool_call.function.arguments or "{}")
+        except json.JSONDecodeError as e:
+            raise AgentError(f"Invalid arguments for tool '{tool_call.function.name}': {e}") from e
+
+def to_content(result: Any) -> str:
+    return str(result) if result is not None else ""
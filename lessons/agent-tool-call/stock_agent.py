@@ -1,13 +1,20 @@
 import asyncio
-from stock_tools import get_stock_price
-from dapr_agents import Agent
+import stock_tools
+from stock_tools import batch_tools, get_stock_price, get_stock_prices
+from parallel_agent import ParallelToolAgent
 from dotenv import load_dotenv
 
 load_dotenv()
 
-tools = [get_stock_price]
+# Make every market data request take half a second, as a real API would,
+# so concurrent and coalesced tool calls show a visible speed-up
+stock_tools.SIMULATED_LATENCY_SECONDS = 0.5
 
-StockAgent = Agent(
+tools = [get_stock_price, get_stock_prices]
+
+# All tool calls from one assistant turn run concurrently, and sibling
+# get_stock_price calls (e.g. AAPL, TSLA and MSFT) are coalesced into one lookup
+StockAgent = ParallelToolAgent(
     name="Stockie",
     role="Stock Market Assistant",
     goal="Assist with stock-related questions and actions",
@@ -16,7 +23,8 @@ StockAgent = Agent(
         "If you perform any additional actions (like jumping), summarize those actions and their results.",
         "At the end, provide a concise summary that combines all stock information and any other actions you performed.",
     ],
-    tools=tools
+    tools=tools,
+    batch_tools=batch_tools
 )
 
 async def main():
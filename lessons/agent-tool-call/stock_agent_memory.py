@@ -1,8 +1,8 @@
 import asyncio
 from stock_tools import get_stock_price
-from dapr_agents import Agent
+from dapr_agents import Agent, OpenAIChatClient
 from dotenv import load_dotenv
-from dapr_agents.memory import ConversationDaprStateMemory
+from windowed_memory import WindowedDaprStateMemory
 
 load_dotenv()
 
@@ -17,7 +17,16 @@ StockAgent = Agent(
         "If you perform any additional actions (like jumping), summarize those actions and their results.",
         "At the end, provide a concise summary that combines all stock information and any other actions you performed.",
     ],
-    memory=ConversationDaprStateMemory(store_name="stockstore",session_id="stock-id"),
+    # Messages are stored as append-only segments; each run only loads the
+    # recent messages plus a rolling summary of everything older, which is
+    # updated in the background
+    memory=WindowedDaprStateMemory(
+        store_name="stockstore",
+        session_id="stock-id",
+        window_size=20,
+        max_tokens=4000,
+        summarizer=OpenAIChatClient()
+    ),
     tools=tools
 )
 
@@ -1,14 +1,51 @@
 from dapr_agents import tool
 from pydantic import BaseModel, Field
+from typing import Dict, List
 import random
+import time
+
+from tool_cache import TTLCache, cached, cached_batch
 
 class GetStockPriceSchema(BaseModel):
     symbol: str = Field(description="Stock ticker symbol to look up")
 
+class GetStockPricesSchema(BaseModel):
+    symbols: List[str] = Field(description="Stock ticker symbols to look up in one request")
+
+# Seconds each market data request takes; demos set this to show the cost of round-trips
+SIMULATED_LATENCY_SECONDS = 0.0
+
+def fetch_stock_prices(symbols: List[str]) -> Dict[str, float]:
+    """Look up prices for many symbols in a single market data request"""
+    if SIMULATED_LATENCY_SECONDS:
+        time.sleep(SIMULATED_LATENCY_SECONDS)
+    return {symbol.upper(): round(random.uniform(100, 500), 2) for symbol in symbols}
+
+# Quotes go stale quickly, so only reuse them for a few seconds
 @tool(args_model=GetStockPriceSchema)
+@cached(TTLCache(ttl_seconds=5, max_entries=1024))
 def get_stock_price(symbol: str) -> str:
     """Get current stock price for a given symbol"""
-    price = round(random.uniform(100, 500), 2)
+    price = fetch_stock_prices([symbol])[symbol.upper()]
     return f"The current price of {symbol.upper()} is ${price}"
 
-tools = [get_stock_price]
\ No newline at end of file
+@tool(args_model=GetStockPricesSchema)
+def get_stock_prices(symbols: List[str]) -> str:
+    """Get current stock prices for several symbols at once"""
+    prices = fetch_stock_prices(symbols)
+    return "\n".join(f"The current price of {symbol} is ${price}" for symbol, price in prices.items())
+
+@cached_batch(get_stock_price.func)
+def get_stock_price_batch(calls: List[dict]) -> List[str]:
+    """
+    Batch form of get_stock_price: one lookup for many sibling calls, one result per call.
+    Each call's arguments have already been validated against GetStockPriceSchema,
+    and quotes cached by get_stock_price are reused.
+    """
+    prices = fetch_stock_prices([call["symbol"] for call in calls])
+    return [f"The current price of {call['symbol'].upper()} is ${prices[call['symbol'].upper()]}" for call in calls]
+
+tools = [get_stock_price, get_stock_prices]
+
+# Tools whose sibling calls in one assistant turn can be coalesced into one invocation
+batch_tools = {get_stock_price.name: get_stock_price_batch}
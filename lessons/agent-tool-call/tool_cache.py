@@ -0,0 +1,183 @@
+from dapr.clients import DaprClient
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, List, Optional, Tuple
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class TTLCache:
+    """
+    Bounded, time-limited cache for tool results.
+
+    Results are kept in process (LRU beyond `max_entries`). With a
+    `store_name`, JSON-serializable results are also written to that Dapr
+    state store so replicas share them.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256, store_name: Optional[str] = None, key_prefix: str = "tool-cache"):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.store_name = store_name
+        self.key_prefix = key_prefix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._client: Optional[DaprClient] = None
+
+    @property
+    def client(self) -> DaprClient:
+        """One gRPC channel to the sidecar for the life of the cache"""
+        with self._lock:
+            if self._client is None:
+                self._client = DaprClient()
+            return self._client
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            self._entries.pop(key, None)
+
+        if self.store_name:
+            data = self.client.get_state(store_name=self.store_name, key=f"{self.key_prefix}||{key}").data
+            if data:
+                expires_at, value = json.loads(data)
+                if expires_at > time.time():
+                    self._remember(key, expires_at, value)
+                    with self._lock:
+                        self.hits += 1
+                    return True, value
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def set(self, key: str, value: Any):
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, expires_at, value)
+
+        if self.store_name:
+            try:
+                data = json.dumps([expires_at, value])
+            except TypeError:
+                return  # only JSON-serializable results are shared across replicas
+            self.client.save_state(
+                store_name=self.store_name,
+                key=f"{self.key_prefix}||{key}",
+                value=data,
+                state_metadata={"ttlInSeconds": str(max(1, int(self.ttl_seconds)))},
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
+
+    def _remember(self, key: str, expires_at: float, value: Any):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+def cache_key(func_name: str, args: tuple, kwargs: dict) -> str:
+    return f"{func_name}:" + hashlib.sha256(
+        json.dumps([args, kwargs], sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+def cached(cache: TTLCache) -> Callable:
+    """
+    Memoize a tool function in `cache`.
+
+    Apply it below `@tool` so the key is built from the arguments after
+    they have been validated against the tool's `args_model`. Async tools
+    stay async, with cache lookups run off the event loop.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = cache_key(func.__name__, args, kwargs)
+                found, value = await asyncio.to_thread(cache.get, key)
+                if found:
+                    logger.info(f"Tool cache hit for {func.__name__}({kwargs})")
+                    return value
+                value = await func(*args, **kwargs)
+                await asyncio.to_thread(cache.set, key, value)
+                return value
+
+            async_wrapper.cache = cache
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = cache_key(func.__name__, args, kwargs)
+            found, value = cache.get(key)
+            if found:
+                logger.info(f"Tool cache hit for {func.__name__}({kwargs})")
+                return value
+            value = func(*args, **kwargs)
+            cache.set(key, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+def cached_batch(single: Callable) -> Callable:
+    """
+    Share the cache of a `@cached` tool function with its batch form.
+
+    Each call is looked up under the key the single tool would use, only
+    the misses are passed to the batch function, and their results are
+    cached for both paths.
+    """
+
+    def decorator(batch: Callable[[List[dict]], List[Any]]) -> Callable[[List[dict]], List[Any]]:
+        @wraps(batch)
+        def wrapper(calls: List[dict]) -> List[Any]:
+            keys = [cache_key(single.__name__, (), call) for call in calls]
+            results: List[Any] = [None] * len(calls)
+            misses = []
+            for i, key in enumerate(keys):
+                found, value = single.cache.get(key)
+                if found:
+                    results[i] = value
+                else:
+                    misses.append(i)
+            if len(misses) < len(calls):
+                logger.info(f"Tool cache hits for {len(calls) - len(misses)} of {len(calls)} {single.__name__} calls")
+            if misses:
+                for i, value in zip(misses, batch([calls[i] for i in misses])):
+                    single.cache.set(keys[i], value)
+                    results[i] = value
+            return results
+
+        wrapper.cache = single.cache
+        return wrapper
+
+    return decorator
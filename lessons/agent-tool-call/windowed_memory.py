@@ -0,0 +1,236 @@
+from concurrent.futures import ThreadPoolExecutor
+from dapr.clients import DaprClient
+from dapr.clients.exceptions import DaprGrpcError
+from dapr.clients.grpc._state import Concurrency, StateOptions
+from dapr_agents.memory import MemoryBase
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Summaries are LLM calls, so they run here instead of inside add_messages
+summary_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="memory-summary")
+
+class WindowedDaprStateMemory(MemoryBase):
+    """
+    Conversation memory stored as append-only segments in a Dapr state store.
+
+    Each message is written once under its own key, next to a small head
+    record holding the message count and a rolling summary. The head is
+    updated with ETag concurrency, so concurrent writers never reuse a
+    segment. Reading the history only loads the last `window_size` messages
+    (trimmed further to roughly `max_tokens`). With a `summarizer`, older
+    messages are folded into the summary in the background, and messages
+    not summarized yet stay in the window, so none fall between the two.
+    Messages trimmed for the token budget are summarized before they are
+    left out, and if summaries keep failing, at most `max_unsummarized`
+    messages before the window are loaded.
+    """
+
+    store_name: str = Field(..., description="Dapr state store holding the conversation")
+    session_id: str = Field(..., description="Conversation to read and write")
+    window_size: int = Field(default=20, description="Maximum number of recent messages to load")
+    max_tokens: Optional[int] = Field(default=None, description="Approximate token budget for the loaded window")
+    summarizer: Optional[Any] = Field(default=None, description="Chat client used to fold old messages into the summary")
+    summarize_every: int = Field(default=20, description="Summarize once this many messages have left the window")
+    head_retries: int = Field(default=5, description="Attempts at updating the head record under concurrent writers")
+    max_unsummarized: int = Field(default=100, description="Most messages loaded from before the window while summaries are failing")
+
+    _client: Optional[DaprClient] = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _summarizing: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def client(self) -> DaprClient:
+        """One gRPC channel to the sidecar for the life of the memory"""
+        with self._lock:
+            if self._client is None:
+                self._client = DaprClient()
+            return self._client
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def add_message(self, message: Union[Dict[str, Any], BaseModel]):
+        self.add_messages([message])
+
+    def add_messages(self, messages: List[Union[Dict[str, Any], BaseModel]]):
+        # Reserve segment numbers first, so a concurrent writer can't take the same ones
+        def reserve(head: Dict[str, Any]) -> Dict[str, Any]:
+            return {**head, "count": head["count"] + len(messages)}
+
+        head = self._update_head(reserve)
+        if head is None:
+            raise RuntimeError(f"Could not append to session {self.session_id}: head record kept changing")
+        first = head["count"] - len(messages)
+        for index, message in enumerate(messages, start=first):
+            self.client.save_state(
+                store_name=self.store_name,
+                key=self._segment_key(index),
+                value=json.dumps(to_dict(message), default=str),
+            )
+        self._schedule_summary(head)
+
+    def add_interaction(self, user_message, assistant_message):
+        self.add_messages([user_message, assistant_message])
+
+    def get_messages(self) -> List[Dict[str, Any]]:
+        head, _ = self._load_head()
+        count = head["count"]
+        if self.summarizer is not None:
+            # Everything the summary doesn't cover yet is still returned, up to a limit if summaries keep failing
+            floor = max(0, count - self.window_size - self.max_unsummarized)
+            if head["summarized_upto"] < floor:
+                logger.warning(f"Summary of session {self.session_id} is {floor - head['summarized_upto']} messages behind the loaded history")
+            start = max(head["summarized_upto"], floor)
+        else:
+            start = max(0, count - self.window_size)
+        loaded = self._load_indexed(start, count)
+
+        # Drop the oldest messages until the window fits the token budget
+        cut = 0
+        if self.max_tokens:
+            total = sum(estimate_tokens(m) for _, m in loaded)
+            while cut < len(loaded) and total > self.max_tokens:
+                total -= estimate_tokens(loaded[cut][1])
+                cut += 1
+        # A window must not open on tool results whose tool call was cut off
+        while cut < len(loaded) and loaded[cut][1].get("role") == "tool":
+            cut += 1
+
+        summary = head["summary"]
+        if self.summarizer is not None and cut:
+            # The dropped messages aren't in the summary yet, so fold them in before leaving them out
+            end = loaded[cut][0] if cut < len(loaded) else count
+            summary = self._fold_before(end, loaded)
+
+        messages = [message for _, message in loaded[cut:]]
+        if summary:
+            messages.insert(0, {"role": "system", "content": f"Summary of the earlier conversation: {summary}"})
+        return messages
+
+    def reset_memory(self):
+        head, _ = self._load_head()
+        for index in range(head["count"]):
+            self.client.delete_state(store_name=self.store_name, key=self._segment_key(index))
+        self.client.delete_state(store_name=self.store_name, key=self._head_key())
+
+    def _schedule_summary(self, head: Dict[str, Any]):
+        if self.summarizer is None or self._summary_range(head) is None:
+            return
+        # One summary per session at a time; the next add picks up anything it missed
+        if self._summarizing.acquire(blocking=False):
+            summary_pool.submit(self._summarize)
+
+    def _summary_range(self, head: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+        window_start = head["count"] - self.window_size
+        if window_start - head["summarized_upto"] < self.summarize_every:
+            return None
+        return head["summarized_upto"], window_start
+
+    def _summarize(self):
+        try:
+            head, _ = self._load_head()
+            summary_range = self._summary_range(head)
+            if summary_range is None:
+                return
+            start, end = summary_range
+            self._fold(head, end, self._load_segments(start, end))
+        except Exception:
+            logger.exception(f"Could not summarize session {self.session_id}")
+        finally:
+            self._summarizing.release()
+
+    def _fold_before(self, end: int, loaded: List[Tuple[int, Dict[str, Any]]]) -> str:
+        """Summarize everything before `end` right away and return the summary to show"""
+        # Waits for a background summary of this session, which may already cover part of the range
+        with self._summarizing:
+            head, _ = self._load_head()
+            start = head["summarized_upto"]
+            if start >= end:
+                return head["summary"]
+            try:
+                updated = self._fold(head, end, [message for index, message in loaded if start <= index < end])
+            except Exception:
+                logger.exception(f"Could not summarize session {self.session_id} before trimming it")
+                updated = None
+        return (updated or self._load_head()[0])["summary"]
+
+    def _fold(self, head: Dict[str, Any], end: int, older: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        start = head["summarized_upto"]
+        transcript = "\n".join(f"{m.get('role')}: {m.get('content') or m.get('tool_calls')}" for m in older)
+        response = self.summarizer.generate(
+            "Update this conversation summary with the new messages. Keep facts the user may refer back to.\n"
+            f"Current summary: {head['summary'] or '(none)'}\n"
+            f"New messages:\n{transcript}"
+        )
+        summary = response.get_message().content
+
+        def apply(current: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            # Another replica already summarized this range
+            if current["summarized_upto"] != start:
+                return None
+            return {**current, "summary": summary, "summarized_upto": end}
+
+        updated = self._update_head(apply)
+        if updated is not None:
+            logger.info(f"Summarized {len(older)} messages for session {self.session_id}")
+        return updated
+
+    def _update_head(self, change: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Apply `change` to the head record with first-write-wins, re-reading on conflict"""
+        for _ in range(self.head_retries):
+            head, etag = self._load_head()
+            updated = change(head)
+            if updated is None:
+                return None
+            try:
+                self.client.save_state(
+                    store_name=self.store_name,
+                    key=self._head_key(),
+                    value=json.dumps(updated),
+                    etag=etag,
+                    options=StateOptions(concurrency=Concurrency.first_write),
+                )
+            except DaprGrpcError as error:
+                logger.debug(f"Head of session {self.session_id} changed concurrently, retrying: {error}")
+                continue
+            return updated
+        logger.warning(f"Could not update the head of session {self.session_id} after {self.head_retries} attempts")
+        return None
+
+    def _load_segments(self, start: int, end: int) -> List[Dict[str, Any]]:
+        return [message for _, message in self._load_indexed(start, end)]
+
+    def _load_indexed(self, start: int, end: int) -> List[Tuple[int, Dict[str, Any]]]:
+        if start >= end:
+            return []
+        keys = {self._segment_key(index): index for index in range(start, end)}
+        items = self.client.get_bulk_state(store_name=self.store_name, keys=list(keys)).items
+        by_key = {item.key: item.data for item in items}
+        # Segments reserved by a writer that hasn't saved them yet are skipped
+        return [(index, json.loads(by_key[key])) for key, index in keys.items() if by_key.get(key)]
+
+    def _load_head(self) -> Tuple[Dict[str, Any], Optional[str]]:
+        response = self.client.get_state(store_name=self.store_name, key=self._head_key())
+        head = json.loads(response.data) if response.data else {"count": 0, "summary": "", "summarized_upto": 0}
+        return head, (response.etag or None)
+
+    def _head_key(self) -> str:
+        return f"{self.session_id}||head"
+
+    def _segment_key(self, index: int) -> str:
+        return f"{self.session_id}||{index:08d}"
+
+def to_dict(message: Union[Dict[str, Any], BaseModel]) -> Dict[str, Any]:
+    return message.model_dump(exclude_none=True) if isinstance(message, BaseModel) else dict(message)
+
+def estimate_tokens(message: Dict[str, Any]) -> int:
+    # Roughly four characters per token is close enough for budgeting
+    return len(json.dumps(message, default=str)) // 4 + 4
@@ -0,0 +1,72 @@
+"""
+Compare the PyTorch SentenceTransformerEmbedder with the ONNX Runtime embedder.
+
+Reports query throughput with several concurrent callers, and recall@k of
+the ONNX embedder's nearest neighbours against the PyTorch ones.
+
+    python benchmark_embedders.py --queries 500 --concurrency 8
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dapr_agents.document.embedder.sentence import SentenceTransformerEmbedder
+from onnx_embedder import OnnxEmbedder
+from typing import List
+import argparse
+import random
+import time
+import numpy as np
+
+SUBJECTS = ["The force", "A detective", "The robot", "My father", "The hero", "A stranger", "The captain", "Our ship"]
+VERBS = ["will be back", "is with you", "never gives up", "keeps a secret", "tells the truth", "comes home", "breaks the rules", "finds the way"]
+ENDINGS = ["tonight.", "in the end.", "no matter what.", "before dawn.", "for the last time.", "in another galaxy.", "when it matters.", "again."]
+
+def make_texts(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(ENDINGS)}" for _ in range(count)]
+
+def throughput(embedder, queries: List[str], concurrency: int) -> float:
+    # one query per call, like the search_quotes tool
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(embedder.embed, queries))
+    return len(queries) / (time.perf_counter() - started)
+
+def top_k(query_vectors: np.ndarray, corpus_vectors: np.ndarray, k: int) -> np.ndarray:
+    query_vectors = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    corpus_vectors = corpus_vectors / np.linalg.norm(corpus_vectors, axis=1, keepdims=True)
+    return np.argsort(-query_vectors @ corpus_vectors.T, axis=1)[:, :k]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends.")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--corpus", type=int, default=2000, help="Documents to search for recall")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = make_texts(args.corpus, seed=1)
+    queries = make_texts(args.queries, seed=2)
+
+    embedders = {
+        "pytorch": SentenceTransformerEmbedder(model=args.model),
+        "onnx": OnnxEmbedder(model=args.model),
+        "onnx-int8": OnnxEmbedder(model=args.model, quantize=True),
+    }
+
+    neighbours = {}
+    for name, embedder in embedders.items():
+        embedder.embed(queries[:8])  # warm up
+        rate = throughput(embedder, queries, args.concurrency)
+        corpus_vectors = np.asarray(embedder.embed(corpus))
+        query_vectors = np.asarray(embedder.embed(queries))
+        neighbours[name] = top_k(query_vectors, corpus_vectors, args.k)
+        print(f"{name:10s} {rate:8.1f} queries/s with {args.concurrency} concurrent callers")
+
+    reference = neighbours["pytorch"]
+    for name, found in neighbours.items():
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(reference, found)])
+        print(f"{name:10s} recall@{args.k} vs pytorch: {recall:.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+from dapr_agents.document.embedder.sentence import SentenceTransformerEmbedder
+from pydantic import Field, PrivateAttr
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from typing import Dict, List, Optional, Union
+import atexit
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache for one model, safe to share between processes.
+
+    Vectors live in a memory-mapped float32 array of `capacity` rows; a
+    SQLite index file maps text hashes to rows and when each was last used.
+    Rows are allocated and the least recently used ones evicted inside one
+    SQLite write transaction, so processes sharing the cache never hand out
+    the same row. Each row also carries a tag of the key it holds, so a row
+    another process has just reused reads as a miss. The most recently used
+    vectors are also kept in an in-process hot tier.
+    """
+
+    def __init__(self, path: str, dim: int, capacity: int = 100_000, hot_size: int = 10_000, save_every: int = 256):
+        self.dim = dim
+        self.capacity = capacity
+        self.hot_size = hot_size
+        self.save_every = save_every
+        self.vectors_path = f"{path}.f32"
+        self.tags_path = f"{path}.tags"
+        self.index_path = f"{path}.index.db"
+        self._lock = threading.Lock()
+        self._hot: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # last-use times not written to the index yet
+        self._touched: Dict[str, float] = {}
+
+        self._db = sqlite3.connect(self.index_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with self._transaction():
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (dim INTEGER, capacity INTEGER)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, row INTEGER UNIQUE, last_used REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS rows_by_use ON rows (last_used)")
+            fresh = self._db.execute("SELECT dim, capacity FROM meta").fetchone() != (dim, capacity)
+            if fresh:
+                # a new cache, or one built for another shape: start over
+                self._db.execute("DELETE FROM meta")
+                self._db.execute("DELETE FROM rows")
+                self._db.execute("INSERT INTO meta VALUES (?, ?)", (dim, capacity))
+            mode = "w+" if fresh or not os.path.exists(self.vectors_path) else "r+"
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(capacity, dim))
+            self._tags = np.memmap(self.tags_path, dtype=np.uint64, mode=mode, shape=(capacity,))
+        atexit.register(self.save)
+
+    @staticmethod
+    def stored_dim(path: str) -> Optional[int]:
+        """Vector size of a cache left at `path` by an earlier run, if any"""
+        if not os.path.exists(f"{path}.index.db"):
+            return None
+        with closing(sqlite3.connect(f"{path}.index.db", timeout=30)) as db:
+            try:
+                meta = db.execute("SELECT dim FROM meta").fetchone()
+            except sqlite3.OperationalError:
+                return None
+        return meta[0] if meta else None
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            lookup = []
+            for key in keys:
+                if key in self._hot:
+                    self._hot.move_to_end(key)
+                    found[key] = self._hot[key]
+                else:
+                    lookup.append(key)
+            for key, row in self._find_rows(lookup).items():
+                vector = np.array(self._vectors[row])
+                # checked after the copy: a row being rewritten by another process has its tag cleared first
+                if self._tags[row] == row_tag(key):
+                    found[key] = vector
+                    self._remember(key, vector)
+            now = time.time()
+            self._touched.update((key, now) for key in found)
+            # writing last-use times takes the write lock, so only do it every few hundred hits
+            if len(self._touched) >= self.save_every:
+                with self._transaction():
+                    self._write_touched()
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]):
+        with self._lock, self._transaction():
+            now = time.time()
+            self._touched.update((key, now) for key in vectors)
+            self._write_touched()
+            existing = self._find_rows(list(vectors))
+            new = [key for key in vectors if key not in existing][: self.capacity]
+
+            used = self._db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM rows").fetchone()[0]
+            rows = list(range(used, min(used + len(new), self.capacity)))
+            if len(rows) < len(new):
+                # evict the least recently used rows
+                evicted = [row for (row,) in self._db.execute(
+                    "SELECT row FROM rows ORDER BY last_used LIMIT ?", (len(new) - len(rows),)
+                )]
+                self._db.executemany("DELETE FROM rows WHERE row = ?", [(row,) for row in evicted])
+                rows.extend(evicted)
+
+            for key, row in zip(new, rows):
+                self._tags[row] = 0
+                self._vectors[row] = vectors[key]
+                self._tags[row] = row_tag(key)
+            self._db.executemany("INSERT INTO rows VALUES (?, ?, ?)", [(key, row, now) for key, row in zip(new, rows)])
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+
+    def save(self):
+        with self._lock, self._transaction():
+            self._write_touched()
+            self._vectors.flush()
+            self._tags.flush()
+
+    def _find_rows(self, keys: List[str]) -> Dict[str, int]:
+        rows = {}
+        # stay under SQLite's limit on query parameters
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            query = f"SELECT key, row FROM rows WHERE key IN ({','.join('?' * len(batch))})"
+            rows.update(self._db.execute(query, batch))
+        return rows
+
+    def _write_touched(self):
+        if self._touched:
+            self._db.executemany("UPDATE rows SET last_used = ? WHERE key = ?", [(t, key) for key, t in self._touched.items()])
+            self._touched.clear()
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the index's write lock, shared by every process using it
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._hot[key] = vector
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+class CachedSentenceTransformerEmbedder(SentenceTransformerEmbedder):
+    """SentenceTransformerEmbedder that only runs the model for texts it has not embedded before"""
+
+    # `cache_dir` is the parent's model download directory, so the embedding cache has its own field
+    embedding_cache_dir: str = Field(default="./embedding_cache", description="Directory holding the on-disk embedding cache")
+    cache_capacity: int = Field(default=100_000, description="Maximum number of vectors kept on disk")
+    hot_size: int = Field(default=10_000, description="Maximum number of vectors kept in memory")
+
+    _cache: Optional[EmbeddingCache] = PrivateAttr(default=None)
+
+    def embed(self, input: Union[str, List[str]], **kwargs) -> Union[List[float], List[List[float]]]:
+        single = isinstance(input, str)
+        texts = [input] if single else list(input)
+        options = json.dumps(kwargs, sort_keys=True, default=str)
+        keys = [cache_key(text, options) for text in texts]
+
+        cache = self._get_cache()
+        cached = cache.get_many(keys) if cache is not None else {}
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        if missing:
+            computed = super().embed(list(missing.values()), **kwargs)
+            computed = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(missing, computed)}
+            self._get_cache(len(next(iter(computed.values())))).put_many(computed)
+            cached.update(computed)
+
+        vectors = [cached[key].tolist() for key in keys]
+        return vectors[0] if single else vectors
+
+    def _get_cache(self, dim: Optional[int] = None) -> Optional[EmbeddingCache]:
+        if self._cache is None:
+            path = os.path.join(self.embedding_cache_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", self.model))
+            if dim is None:
+                # reopen a cache left by an earlier run; otherwise wait for the first vector
+                dim = EmbeddingCache.stored_dim(path)
+                if dim is None:
+                    return None
+            os.makedirs(self.embedding_cache_dir, exist_ok=True)
+            self._cache = EmbeddingCache(path, dim=dim, capacity=self.cache_capacity, hot_size=self.hot_size)
+        return self._cache
+
+def cache_key(text: str, options: str = "") -> str:
+    # collapse whitespace so trivially different copies of a text share one vector
+    normalized = " ".join(text.split())
+    return hashlib.sha256(f"{options}\n{normalized}".encode("utf-8")).hexdigest()
+
+def row_tag(key: str) -> int:
+    # a non-zero tag of the key held in a row; zero marks a row being written
+    return int(key[:15], 16) or 1
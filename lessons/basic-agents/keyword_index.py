@@ -0,0 +1,91 @@
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import re
+import sqlite3
+import threading
+
+# Words too common to say anything about which quote is meant
+STOPWORDS = frozenset("""
+a about an and are as at be but by can do for from had has have he her his i if in is it its me my
+no not of on or our she so that the their them then there they this to was we were what when where
+which who why will with you your
+""".split())
+
+class KeywordIndex:
+    """
+    Persistent BM25 keyword index over a collection's documents.
+
+    Backed by an SQLite FTS5 inverted index, so a query only reads the
+    postings of its own terms and ranks every matching document, not just
+    the first few that contain a term. Documents are keyed by their ID in
+    the vector store, and the `filter_fields` of their metadata are kept
+    next to them so searches take the same equality filters.
+    """
+
+    def __init__(self, path: str, filter_fields: Sequence[str] = ()):
+        self.filter_fields = tuple(filter_fields)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._db:
+            columns = "".join(f", {field} TEXT" for field in self.filter_fields)
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS docs (id INTEGER PRIMARY KEY, doc_id TEXT UNIQUE{columns})")
+            self._db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(text, tokenize='unicode61')")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def upsert(self, entries: Iterable[Tuple[str, str, Optional[Dict]]]):
+        """Index (doc_id, text, metadata) entries, replacing earlier versions of the same IDs"""
+        with self._lock, self._db:
+            for doc_id, text, metadata in entries:
+                old = self._db.execute("SELECT id FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+                if old:
+                    self._db.execute("DELETE FROM docs_fts WHERE rowid = ?", old)
+                    self._db.execute("DELETE FROM docs WHERE id = ?", old)
+                values = [(metadata or {}).get(field) for field in self.filter_fields]
+                placeholders = ", ".join("?" * (len(values) + 1))
+                columns = ", ".join(("doc_id",) + self.filter_fields)
+                row = self._db.execute(f"INSERT INTO docs ({columns}) VALUES ({placeholders})", [doc_id, *values]).lastrowid
+                self._db.execute("INSERT INTO docs_fts (rowid, text) VALUES (?, ?)", (row, text))
+
+    def search(self, query: str, limit: int, where: Optional[Dict] = None) -> List[str]:
+        """IDs of the documents best matching `query` by BM25, best first"""
+        terms = query_terms(query)
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+        conditions, params = self._filter(where)
+        sql = (
+            "SELECT docs.doc_id FROM docs_fts JOIN docs ON docs.id = docs_fts.rowid "
+            f"WHERE docs_fts MATCH ?{''.join(f' AND {c}' for c in conditions)} "
+            "ORDER BY bm25(docs_fts) LIMIT ?"
+        )
+        with self._lock:
+            return [doc_id for (doc_id,) in self._db.execute(sql, [match, *params, limit])]
+
+    def _filter(self, where: Optional[Dict]) -> Tuple[List[str], List]:
+        # The equality filters search_quotes builds: {field: value}, {field: {"$eq": value}} and $and of those
+        if not where:
+            return [], []
+        if "$and" in where:
+            conditions, params = [], []
+            for clause in where["$and"]:
+                clause_conditions, clause_params = self._filter(clause)
+                conditions += clause_conditions
+                params += clause_params
+            return conditions, params
+        conditions, params = [], []
+        for field, value in where.items():
+            if isinstance(value, dict) and set(value) == {"$eq"}:
+                value = value["$eq"]
+            if field not in self.filter_fields or isinstance(value, dict):
+                raise ValueError(f"Unsupported keyword filter: {field}={value}")
+            conditions.append(f"docs.{field} = ?")
+            params.append(value)
+        return conditions, params
+
+def query_terms(query: str) -> List[str]:
+    """Distinct query words, without stopwords unless the query has nothing else"""
+    words = list(dict.fromkeys(re.findall(r"\w+", query.lower())))
+    return [word for word in words if word not in STOPWORDS] or words
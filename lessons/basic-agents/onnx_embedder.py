@@ -0,0 +1,138 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dapr_agents.document.embedder.base import EmbedderBase
+from pydantic import Field, PrivateAttr
+from typing import Any, List, Optional, Tuple, Union
+import logging
+import os
+import platform
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+PORTABLE_ONNX_FILE = "onnx/model.onnx"
+
+def quantized_onnx_file() -> Optional[str]:
+    """The int8 export in sentence-transformers model repos that suits this CPU, if any"""
+    machine = platform.machine().lower()
+    if machine in ("arm64", "aarch64"):
+        return "onnx/model_qint8_arm64.onnx"
+    if machine not in ("x86_64", "amd64"):
+        return None
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = next((line.split(":", 1)[1].split() for line in f if line.startswith("flags")), [])
+    except OSError:
+        return None
+    if "avx512_vnni" in flags:
+        return "onnx/model_qint8_avx512_vnni.onnx"
+    if "avx512f" in flags:
+        return "onnx/model_qint8_avx512.onnx"
+    if "avx2" in flags:
+        return "onnx/model_quint8_avx2.onnx"
+    return None
+
+class OnnxEmbedder(EmbedderBase):
+    """
+    CPU embedder with the same interface as SentenceTransformerEmbedder.
+
+    Runs the model through ONNX Runtime, using the portable export unless
+    `quantize` picks the int8 export for this CPU, on a thread pool sized to
+    the number of cores. Texts from concurrent callers are batched together:
+    a request is encoded as soon as a thread is free, and while every thread
+    is busy, new requests queue up and are encoded in one call by the next
+    thread to finish. ONNX Runtime's own threads are split between the pool's
+    threads, so the two don't oversubscribe the cores.
+    """
+
+    model: str = Field(default="all-MiniLM-L6-v2", description="Sentence-transformers model name")
+    file_name: Optional[str] = Field(default=None, description="ONNX file in the model repo; by default the portable export, or an int8 one matching this CPU when quantize is set")
+    quantize: bool = Field(default=False, description="Use the int8 export for this CPU's instruction set when file_name is not given")
+    normalize_embeddings: bool = Field(default=True, description="Return unit-length vectors")
+    max_batch_size: int = Field(default=64, description="Most texts encoded in one call")
+    workers: int = Field(default_factory=lambda: os.cpu_count() or 1, description="Threads running the model")
+
+    _client: Any = PrivateAttr(default=None)
+    _requests: "queue.Queue[Tuple[List[str], Future]]" = PrivateAttr(default_factory=queue.Queue)
+    _pool: Optional[ThreadPoolExecutor] = PrivateAttr(default=None)
+    _idle: Optional[threading.Semaphore] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        from sentence_transformers import SentenceTransformer
+
+        file_name = self.file_name or (self.quantize and quantized_onnx_file()) or PORTABLE_ONNX_FILE
+        try:
+            self._client = self._load(SentenceTransformer, file_name)
+        except Exception as e:
+            # Not every model repo publishes every quantized export
+            if self.file_name or file_name == PORTABLE_ONNX_FILE:
+                raise
+            logger.warning(f"Could not load {file_name} for {self.model} ({e}), using {PORTABLE_ONNX_FILE}")
+            file_name = PORTABLE_ONNX_FILE
+            self._client = self._load(SentenceTransformer, file_name)
+        logger.info(f"Loaded {self.model} from {file_name} with ONNX Runtime")
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="onnx-embed")
+        self._idle = threading.Semaphore(self.workers)
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        super().model_post_init(__context)
+
+    def embed(self, input: Union[str, List[str]], **kwargs) -> Union[List[float], List[List[float]]]:
+        single = isinstance(input, str)
+        texts = [input] if single else list(input)
+        if not texts:
+            return []
+        future: Future = Future()
+        self._requests.put((texts, future))
+        vectors = future.result()
+        return vectors[0] if single else vectors
+
+    def __call__(self, input: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+        return self.embed(input)
+
+    def name(self) -> str:
+        # Chroma records this with the collection; it is the same model and vector
+        # space as SentenceTransformerEmbedder, so either backend can open the collection
+        return f"sentence-transformer-{self.model}"
+
+    def _load(self, sentence_transformer: Any, file_name: str) -> Any:
+        import onnxruntime
+
+        # The pool's threads run the session concurrently, so each run gets an equal share of the cores
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        session_options.inter_op_num_threads = 1
+        model_kwargs = {"provider": "CPUExecutionProvider", "file_name": file_name, "session_options": session_options}
+        return sentence_transformer(self.model, backend="onnx", model_kwargs=model_kwargs)
+
+    def _batch_loop(self):
+        while True:
+            pending = [self._requests.get()]
+            # Wait for a free thread; requests arriving meanwhile join this batch
+            self._idle.acquire()
+            size = len(pending[0][0])
+            while size < self.max_batch_size:
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                pending.append(request)
+                size += len(request[0])
+            self._pool.submit(self._encode, pending)
+
+    def _encode(self, pending: List[Tuple[List[str], Future]]):
+        texts = [text for request_texts, _ in pending for text in request_texts]
+        try:
+            vectors = self._client.encode(
+                texts, batch_size=self.max_batch_size, normalize_embeddings=self.normalize_embeddings
+            ).tolist()
+        except Exception as e:
+            logger.exception("ONNX embedding batch failed")
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        finally:
+            self._idle.release()
+        start = 0
+        for request_texts, future in pending:
+            future.set_result(vectors[start:start + len(request_texts)])
+            start += len(request_texts)
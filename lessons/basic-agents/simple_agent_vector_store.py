@@ -1,30 +1,215 @@
+import time
+
+# Started before the dapr_agents imports, which are most of the import time;
+# `python -X importtime simple_agent_vector_store.py` breaks it down per module
+import_started = time.perf_counter()
+
 from dapr_agents import Agent
-from dapr_agents.document.embedder.sentence import SentenceTransformerEmbedder
-from dapr_agents.storage.vectorstores import ChromaVectorStore
 from dapr_agents.tool import tool
 from dapr_agents.types.document import Document
 from dotenv import load_dotenv
+from typing import Dict, List, Optional
 import asyncio
+import hashlib
 import logging
 import json
+import os
+import threading
 
 logging.basicConfig(level=logging.INFO)
 load_dotenv()
 
-# Setup embedding function and persistent vector store
-embedding_function = SentenceTransformerEmbedder(model="all-MiniLM-L6-v2")
-vector_store = ChromaVectorStore(
-    name="quote_vectorstore",
-    embedding_function=embedding_function,
-    persistent=True,  # Data persists between runs
-    path="./quote_db"
-)
+# The embedding model and vector store are built on first use (or by the
+# background warm-up), so importing this module does not load torch
+_vector_store = None
+_vector_store_lock = threading.Lock()
+_keyword_index = None
+_keyword_index_lock = threading.Lock()
+# Set once the seed quotes are stored, so searches never run against a half-seeded store
+_seeded = threading.Event()
+_seed_lock = threading.Lock()
+_first_query_logged = False
+
+def get_vector_store():
+    """Build the embedding function and persistent vector store on first use"""
+    global _vector_store
+    if _vector_store is None:
+        with _vector_store_lock:
+            if _vector_store is None:
+                started = time.perf_counter()
+                from dapr_agents.storage.vectorstores import ChromaVectorStore
+
+                if os.getenv("EMBEDDER_BACKEND") == "onnx":
+                    # int8-quantized ONNX Runtime model for CPU-only nodes, picked
+                    # for this CPU's instruction set
+                    from onnx_embedder import OnnxEmbedder
+                    embedding_function = OnnxEmbedder(model="all-MiniLM-L6-v2", quantize=True)
+                else:
+                    # Embeddings are cached on disk so repeated queries and
+                    # re-ingested documents skip the model
+                    from embedding_cache import CachedSentenceTransformerEmbedder
+                    embedding_function = CachedSentenceTransformerEmbedder(model="all-MiniLM-L6-v2", embedding_cache_dir="./embedding_cache")
+                _vector_store = ChromaVectorStore(
+                    name="quote_vectorstore",
+                    embedding_function=embedding_function,
+                    persistent=True,  # Data persists between runs
+                    path="./quote_db"
+                )
+                logging.info(f"Loaded embedding model and vector store in {time.perf_counter() - started:.2f}s")
+    return _vector_store
+
+def get_keyword_index():
+    """Open the BM25 keyword index next to the vector store, catching up with quotes it is missing"""
+    global _keyword_index
+    if _keyword_index is None:
+        with _keyword_index_lock:
+            if _keyword_index is None:
+                from keyword_index import KeywordIndex
+
+                collection = get_vector_store().collection
+                index = KeywordIndex("./quote_keywords.db", filter_fields=[f"{field}_lower" for field in FILTER_FIELDS])
+                total = collection.count()
+                if index.count() != total:
+                    # Quotes stored before the index existed, or by a run that stopped between the two writes
+                    for offset in range(0, total, 1000):
+                        page = collection.get(limit=1000, offset=offset, include=["documents", "metadatas"])
+                        index.upsert(zip(page["ids"], page["documents"], page["metadatas"]))
+                    logging.info(f"Indexed keywords of {total} stored quotes")
+                _keyword_index = index
+    return _keyword_index
+
+# Initial famous quotes to seed the vector store with
+SEED_QUOTES = [
+    Document(text="May the force be with you.", metadata={"character": "Obi-Wan", "movie": "Star Wars"}),
+    Document(text="I'll be back", metadata={"character": "Terminator", "movie": "The Terminator"}),
+    Document(text="Why so serious?", metadata={"character": "Joker", "movie": "The Dark Knight"})
+]
+
+def warm_up():
+    """Load the model and seed the vector store, meant to run in a background thread"""
+    ensure_seeded()
+
+def ensure_seeded():
+    """Seed the vector store once; callers arriving during seeding wait for it to finish"""
+    if _seeded.is_set():
+        return
+    with _seed_lock:
+        if _seeded.is_set():
+            return
+        logging.info("Seeding vector store with initial documents...")
+        added = bulk_add_documents(SEED_QUOTES)
+        logging.info(f"Seeded {len(added)} new documents ({len(SEED_QUOTES) - len(added)} already present)")
+        _seeded.set()
+
+# Chroma's metadata filters are case-sensitive, so each quote is stored as
+# lowercased text with lowercased copies of these fields to match against,
+# and the original text and metadata are kept alongside for display
+FILTER_FIELDS = ("movie", "character")
+
+def search_text(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+def stored_metadata(doc: Document) -> Dict:
+    metadata = dict(doc.metadata or {})
+    for field in FILTER_FIELDS:
+        if isinstance(metadata.get(field), str):
+            metadata[f"{field}_lower"] = metadata[field].lower()
+    metadata["text"] = doc.text
+    return metadata
 
-# Tool to search for similar documents using semantic search
+def display_form(document: str, metadata: Optional[Dict]) -> tuple:
+    """Original quote text and metadata of a stored quote"""
+    metadata = dict(metadata or {})
+    text = metadata.pop("text", document)
+    for field in FILTER_FIELDS:
+        metadata.pop(f"{field}_lower", None)
+    return text, metadata
+
+def content_id(doc: Document) -> str:
+    """Stable ID from the normalized text and metadata, so re-adding a document is a no-op"""
+    key = json.dumps({"text": " ".join(doc.text.split()).lower(), "metadata": doc.metadata}, sort_keys=True)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def bulk_add_documents(documents: List[Document], batch_size: int = 256) -> List[str]:
+    """Embed and write documents in batches, skipping any that are already stored"""
+    vector_store = get_vector_store()
+    added = []
+    for start in range(0, len(documents), batch_size):
+        batch = {content_id(doc): doc for doc in documents[start:start + batch_size]}
+        stored = vector_store.collection.get(ids=list(batch), include=["metadatas"])
+        # Quotes stored before the lowercased search fields existed are rewritten
+        existing = {doc_id for doc_id, meta in zip(stored["ids"], stored["metadatas"]) if meta and "text" in meta}
+        new = {doc_id: doc for doc_id, doc in batch.items() if doc_id not in existing}
+        if not new:
+            continue
+        texts = [doc.text for doc in new.values()]
+        documents = [search_text(text) for text in texts]
+        metadatas = [stored_metadata(doc) for doc in new.values()]
+        vector_store.collection.upsert(
+            ids=list(new),
+            documents=documents,
+            embeddings=vector_store.embedding_function.embed(texts),
+            metadatas=metadatas,
+        )
+        get_keyword_index().upsert(zip(new, documents, metadatas))
+        added.extend(new)
+    return added
+
+def search_similar_filtered(query: str, k: int = 3, where: Optional[Dict] = None, mode: str = "hybrid", candidates: int = 50) -> Dict[str, List]:
+    """
+    Search the quote collection with optional metadata filters.
+
+    Keyword matching and `where` filters on the `*_lower` fields are
+    case-insensitive, since quotes are stored lowercased.
+
+    mode="vector" ranks by embedding similarity only. mode="hybrid" also ranks
+    the whole collection by BM25 through the keyword index and fuses the top
+    `candidates` of both rankings with reciprocal rank fusion. Filters narrow
+    the candidates before scoring.
+    """
+    collection = get_vector_store().collection
+    query_embedding = get_vector_store().embedding_function.embed(query)
+    vector_hits = collection.query(
+        query_embeddings=[query_embedding],
+        n_results=candidates if mode == "hybrid" else k,
+        where=where or None,
+        include=["documents", "metadatas"],
+    )
+    ids = vector_hits["ids"][0]
+    docs = dict(zip(ids, zip(vector_hits["documents"][0], vector_hits["metadatas"][0])))
+    if mode != "hybrid":
+        return to_results(docs, ids)
+
+    fused: Dict[str, float] = {doc_id: 1 / (60 + rank) for rank, doc_id in enumerate(ids, start=1)}
+    keyword_ids = get_keyword_index().search(query, limit=candidates, where=where)
+    missing = [doc_id for doc_id in keyword_ids if doc_id not in docs]
+    if missing:
+        keyword_hits = collection.get(ids=missing, include=["documents", "metadatas"])
+        docs.update(zip(keyword_hits["ids"], zip(keyword_hits["documents"], keyword_hits["metadatas"])))
+    for rank, doc_id in enumerate(keyword_ids, start=1):
+        if doc_id in docs:
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1 / (60 + rank)
+
+    best = sorted(fused, key=fused.get, reverse=True)[:k]
+    return to_results(docs, best)
+
+def to_results(docs: Dict[str, tuple], ids: List[str]) -> Dict[str, List]:
+    hits = [display_form(*docs[i]) for i in ids]
+    return {"documents": [text for text, _ in hits], "metadatas": [meta for _, meta in hits]}
+
+# Tool to search for similar documents using semantic + keyword search
 @tool
-def search_quotes(query: str) -> str:
-    """Search for quote documents in the vector store"""
-    results = vector_store.search_similar(query_texts=query, k=3)
+def search_quotes(query: str, movie: str = "", character: str = "", mode: str = "hybrid") -> str:
+    """Search for quote documents in the vector store, optionally only from a given movie or character. mode is "hybrid" (meaning and keywords) or "vector" (meaning only)."""
+    global _first_query_logged
+    started = time.perf_counter()
+    ensure_seeded()
+    filters = [{f"{key}_lower": value.lower()} for key, value in (("movie", movie), ("character", character)) if value]
+    where = {"$and": filters} if len(filters) > 1 else (filters[0] if filters else None)
+    results = search_similar_filtered(query, k=3, where=where, mode=mode)
+    if not _first_query_logged:
+        _first_query_logged = True
+        logging.info(f"First quote search took {time.perf_counter() - started:.2f}s")
     docs = results.get("documents", [])
     metadatas = results.get("metadatas", [])
     if not docs:
@@ -40,21 +225,15 @@ def add_quote(content: str, metadata: str = "") -> str:
     except Exception:
         meta = {"info": metadata}
     doc = Document(text=content, metadata=meta)
-    ids = vector_store.add_documents(documents=[doc])
-    return f"Added quote with ID {ids[0]}" if ids else "Quote added (no ID returned)"
+    ids = bulk_add_documents([doc])
+    return f"Added quote with ID {ids[0]}" if ids else f"Quote already stored with ID {content_id(doc)}"
 
 async def main():
     logging.info("Starting QuoteFinderAgent application")
-    
-    # Seed the vector store with initial famous quotes
-    quotes = [
-        Document(text="May the force be with you.", metadata={"character": "Obi-Wan", "movie": "Star Wars"}),
-        Document(text="I'll be back", metadata={"character": "Terminator", "movie": "The Terminator"}),
-        Document(text="Why so serious?", metadata={"character": "Joker", "movie": "The Dark Knight"})
-    ]
-    logging.info("Seeding vector store with initial documents...")
-    vector_store.add_documents(quotes)
-    logging.info(f"Seeded {len(quotes)} initial documents")
+
+    # Load the model and seed the store in the background; a search that
+    # runs first waits until the seed quotes are stored
+    threading.Thread(target=warm_up, daemon=True).start()
 
     # Create the agent with vector store capabilities
     logging.info("Creating QuoteFinderAgent...")
@@ -64,10 +243,10 @@ async def main():
         goal="Find and store famous movie quotes",
         instructions=[
             "Search quotes by meaning or keywords",
+            "When the user names a movie or character, pass it as a search filter",
             "Add new quotes with metadata",
         ],
-        tools=[search_quotes,add_quote],  # Provide search and add tools
-        vector_store=vector_store  # Connect the vector store to the agent
+        tools=[search_quotes,add_quote]  # Provide search and add tools; they open the vector store on first use
     )
     logging.info("Agent created successfully")
 
@@ -78,6 +257,8 @@ async def main():
     print(await agent.run("Search for quotes from Star Wars"))
     logging.info("Application completed successfully")
 
+logging.info(f"Module initialized in {time.perf_counter() - import_started:.2f}s")
+
 if __name__ == "__main__":
     try:
         asyncio.run(main())
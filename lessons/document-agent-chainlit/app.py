@@ -1,93 +1,351 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
 import chainlit as cl
-from dapr.clients import DaprClient
+import grpc
+from dapr.aio.clients import DaprClient
 from dotenv import load_dotenv
-from unstructured.partition.pdf import partition_pdf
+from pypdf import PdfReader
 
 from dapr_agents import Agent
+from dapr_agents.document.embedder.sentence import SentenceTransformerEmbedder
 from dapr_agents.memory import ConversationDaprStateMemory
+from dapr_agents.storage.vectorstores import ChromaVectorStore
 from dapr_agents.types import AssistantMessage
+from dapr_agents.types.document import Document
 from dapr_agents import OpenAIChatClient
 
+from partitioning import partition_pages
+
 load_dotenv()
 
 instructions = [
     "You are an assistant designed to understand and converse about user-uploaded documents. "
     "Your primary goal is to provide accurate, clear, and helpful answers based solely on the contents of the uploaded document. "
+    "Each question comes with the most relevant excerpts of the document; answer from those excerpts. "
     "If something is unclear or you need more context, ask thoughtful clarifying questions. "
     "Avoid making assumptions beyond the document. Stay focused on what's written, and help the user explore or understand it as deeply as they'd like."
 ]
 
-agent = Agent(
-    name="KnowledgeBase",
-    role="Content Expert",
-    instructions=instructions,
-    memory=ConversationDaprStateMemory(
-        store_name="conversationstore", session_id="my-unique-id"
-    ),
-    llm=OpenAIChatClient(model="gpt-3.5-turbo"),
+# One LLM client and one Dapr client shared by every chat session
+llm = OpenAIChatClient(model="gpt-3.5-turbo")
+dapr_client = None
+
+
+def get_dapr_client() -> DaprClient:
+    # one async Dapr client (one gRPC channel) kept open for the whole process
+    global dapr_client
+    if dapr_client is None:
+        dapr_client = DaprClient()
+    return dapr_client
+
+
+# One agent per chat session, each with its own conversation record;
+# the least recently used sessions are dropped beyond MAX_SESSIONS
+MAX_SESSIONS = 100
+agents: "OrderedDict[str, Agent]" = OrderedDict()
+
+
+def get_agent(session_id: str) -> Agent:
+    if session_id not in agents:
+        agents[session_id] = Agent(
+            name="KnowledgeBase",
+            role="Content Expert",
+            instructions=instructions,
+            memory=ConversationDaprStateMemory(
+                store_name="conversationstore", session_id=session_id
+            ),
+            llm=llm,
+        )
+        while len(agents) > MAX_SESSIONS:
+            agents.popitem(last=False)
+    agents.move_to_end(session_id)
+    return agents[session_id]
+
+class DocumentIndex:
+    """Vector index of one uploaded file, shared by every session that uploads it"""
+
+    def __init__(self, file_key: str, vector_store: ChromaVectorStore):
+        self.file_key = file_key
+        self.vector_store = vector_store
+        # set once the first pages are searchable, or ingestion failed
+        self.first_batch_indexed = asyncio.Event()
+        self.error: Optional[str] = None
+        # chat sessions using this index; it is dropped when the last one ends
+        self.sessions: Set[str] = set()
+        self.ingestion: Optional[asyncio.Task] = None
+
+
+# Embed document chunks once and keep one vector index per uploaded file
+# that an open chat session is using
+embedding_function = SentenceTransformerEmbedder(model="all-MiniLM-L6-v2")
+indexes: Dict[str, DocumentIndex] = {}
+
+TOP_K = 4
+MAX_CHUNK_CHARS = 1500
+PAGES_PER_BATCH = 5
+MAX_UPLOAD_MB = 10
+# Larger files are read and written as numbered parts of this size plus a
+# manifest; it stays well under the 4 MB default gRPC message limit of the
+# client and the sidecar
+UPLOAD_CHUNK_BYTES = 2 * 1024 * 1024
+UPLOAD_RETRIES = 4
+# Statuses worth retrying; anything else fails at once. RESOURCE_EXHAUSTED is
+# left out: it is also how an oversized message is rejected, which never succeeds
+TRANSIENT_GRPC_CODES = {
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.ABORTED,
+}
+
+# Partition page batches in parallel, off the event loop; each worker holds a
+# full unstructured pipeline in memory, so only a few run at once. Workers are
+# spawned rather than forked, so they don't inherit the event loop, gRPC
+# channels or threads of this process
+PARTITION_WORKERS = min(4, os.cpu_count() or 1)
+partition_pool = ProcessPoolExecutor(
+    max_workers=PARTITION_WORKERS, mp_context=multiprocessing.get_context("spawn")
 )
+# Keep references to background ingestion and upload tasks until they finish
+background_tasks = set()
+
+
+def run_in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+def release_index(index: DocumentIndex, session_id: str):
+    # once no session uses the index, stop indexing and drop its collection
+    index.sessions.discard(session_id)
+    if index.sessions:
+        return
+    if indexes.get(index.file_key) is index:
+        del indexes[index.file_key]
+    if index.ingestion is not None:
+        index.ingestion.cancel()
+    try:
+        index.vector_store.client.delete_collection(index.vector_store.name)
+    except Exception as e:
+        print(f"Could not delete collection {index.vector_store.name}: {e}")
 
 
 @cl.on_chat_start
 async def start():
-    files = None
-
-    # Wait for the user to upload a file
-    while files is None:
-        files = await cl.AskFileMessage(
-            content="Please upload a document to begin!",
-            accept=["application/pdf"],
-            max_size_mb=10,
-            max_files=1,
-        ).send()
+    session_id = cl.user_session.get("id")
+    while True:
+        files = None
 
-    text_file = files[0]
-    elements = partition_pdf(filename=text_file.path)
+        # Wait for the user to upload a file
+        while files is None:
+            files = await cl.AskFileMessage(
+                content="Please upload a document to begin!",
+                accept=["application/pdf"],
+                max_size_mb=MAX_UPLOAD_MB,
+                max_files=1,
+            ).send()
 
-    # Use extract LLM-ready text and associated metadata
-    document_text = "\n\n".join(
-        [
-            f"[{el.category}] {el.text.strip()}"
-            for el in elements
-            if el.text and el.text.strip()
-        ]
-    )
+        text_file = files[0]
 
-    # upload the file
-    with open(text_file.path, "rb") as f:
-        file_bytes = f.read()
-        upload(file_bytes, text_file.name, "upload")
+        # upload the file in the background while the document is indexed
+        run_in_background(upload(text_file.path, text_file.name, "upload"))
 
-    # give the model the document to learn
-    response: AssistantMessage = await agent.run(
-        "This is a document element to learn: " + document_text
-    )
+        file_key = await asyncio.to_thread(hash_file, text_file.path)
+        index = indexes.get(file_key)
+        if index is None:
+            index = indexes[file_key] = DocumentIndex(
+                file_key,
+                # a fresh collection per attempt, so re-indexing after a
+                # failure never mixes with the partial index
+                ChromaVectorStore(
+                    name=f"doc-{file_key}-{uuid.uuid4().hex[:8]}",
+                    embedding_function=embedding_function,
+                ),
+            )
+            index.ingestion = run_in_background(ingest(text_file.path, text_file.name, index))
+        # registered before waiting, so a session closed mid-indexing still releases it
+        index.sessions.add(session_id)
+        cl.user_session.set("index", index)
 
-    await cl.Message(content=f"`{text_file.name}` uploaded.").send()
+        # the user can start asking questions as soon as the first pages are
+        # indexed, whichever session started indexing this file
+        await index.first_batch_indexed.wait()
+        if index.error is None:
+            break
+        release_index(index, session_id)
+        cl.user_session.set("index", None)
+        await cl.Message(
+            content=f"Sorry, `{text_file.name}` could not be indexed ({index.error}). Please try uploading it again."
+        ).send()
 
-    await cl.Message(content=response.content).send()
+    await cl.Message(
+        content=f"`{text_file.name}` uploaded and ready. Ask me anything about it!"
+    ).send()
 
 
 @cl.on_message
 async def main(message: cl.Message):
+    # retrieve only the chunks relevant to this question
+    index: DocumentIndex = cl.user_session.get("index")
+    if index.error is not None and not cl.user_session.get("warned_partial_index"):
+        cl.user_session.set("warned_partial_index", True)
+        await cl.Message(
+            content=f"Note: indexing stopped partway ({index.error}), so answers may miss later pages. "
+            "Upload the document again in a new chat to re-index it."
+        ).send()
+    results = await asyncio.to_thread(index.vector_store.search_similar, query_texts=message.content, k=TOP_K)
+    excerpts = "\n---\n".join(
+        f"[{meta.get('section', '')}] {doc}" for doc, meta in first_query_hits(results)
+    ) or "(no relevant excerpts found)"
+
     # chat to the model about the document
-    result: AssistantMessage = await agent.run(message.content)
+    agent = get_agent(cl.user_session.get("id"))
+    result: AssistantMessage = await agent.run(
+        f"Relevant document excerpts:\n{excerpts}\n\nQuestion: {message.content}"
+    )
 
     await cl.Message(
         content=result.content,
     ).send()
 
 
-def upload(contents: bytes, filename: str, binding_name: str):
-    # upload the file to any storage provider using the same code with Dapr
+def first_query_hits(results) -> List[Tuple[str, dict]]:
+    # Chroma returns one list of documents and metadatas per query text,
+    # and search_similar returns [] when the query fails
+    if not results:
+        return []
+    documents = (results.get("documents") or [[]])[0]
+    metadatas = (results.get("metadatas") or [[]])[0] or [None] * len(documents)
+    return [(doc, meta or {}) for doc, meta in zip(documents, metadatas)]
+
+
+@cl.on_chat_end
+async def end():
+    # free the in-process agent; the stored history stays in the state store,
+    # so a reconnecting session picks up where it left off
+    session_id = cl.user_session.get("id")
+    agents.pop(session_id, None)
+    index: Optional[DocumentIndex] = cl.user_session.get("index")
+    if index is not None:
+        release_index(index, session_id)
+
+
+async def ingest(path: str, filename: str, index: DocumentIndex):
+    # partition page batches in the process pool and index each one as soon as it is ready
+    loop = asyncio.get_running_loop()
+    batches = []
+    try:
+        page_count = await asyncio.to_thread(lambda: len(PdfReader(path).pages))
+        batches = [
+            loop.run_in_executor(partition_pool, partition_pages, path, start, min(start + PAGES_PER_BATCH, page_count))
+            for start in range(0, page_count, PAGES_PER_BATCH)
+        ]
+
+        chunker = SectionChunker(filename)
+        for batch in batches:
+            chunks = chunker.feed(await batch)
+            if chunks:
+                await asyncio.to_thread(index.vector_store.add_documents, documents=chunks)
+            index.first_batch_indexed.set()
+        chunks = chunker.flush()
+        if chunks:
+            await asyncio.to_thread(index.vector_store.add_documents, documents=chunks)
+        print(f"Indexed all {page_count} pages of {filename}")
+    except Exception as e:
+        print(f"Indexing {filename} failed: {e}")
+        index.error = str(e) or type(e).__name__
+        # forget the partial index so the next upload of this file starts over
+        if indexes.get(index.file_key) is index:
+            del indexes[index.file_key]
+    finally:
+        # after a failure, or when the last session using the index ended
+        for batch in batches:
+            batch.cancel()
+        index.first_batch_indexed.set()
+
+
+class SectionChunker:
+    """Group (category, text) elements into sections that start at each title, splitting long sections"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.section, self.lines, self.size = "", [], 0
+
+    def feed(self, elements: List[Tuple[str, str]]) -> List[Document]:
+        chunks: List[Document] = []
+        for category, text in elements:
+            if category == "Title" or self.size + len(text) > MAX_CHUNK_CHARS:
+                chunks.extend(self.flush())
+                if category == "Title":
+                    self.section = text
+            self.lines.append(f"[{category}] {text}")
+            self.size += len(text)
+        return chunks
+
+    def flush(self) -> List[Document]:
+        if not self.lines:
+            return []
+        chunk = Document(
+            text="\n".join(self.lines),
+            metadata={"file": self.filename, "section": self.section},
+        )
+        self.lines, self.size = [], 0
+        return [chunk]
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+async def upload(path: str, filename: str, binding_name: str):
+    # upload the file to any storage provider using the same code with Dapr;
+    # large files are streamed from disk as numbered parts plus a manifest,
+    # so only one chunk is held in memory at a time
     try:
-        with DaprClient() as d:
-            d.invoke_binding(
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            if size <= UPLOAD_CHUNK_BYTES:
+                await write_with_retry(binding_name, filename, await asyncio.to_thread(f.read))
+            else:
+                parts = []
+                while chunk := await asyncio.to_thread(f.read, UPLOAD_CHUNK_BYTES):
+                    part_key = f"{filename}.parts/{len(parts):05d}"
+                    await write_with_retry(binding_name, part_key, chunk)
+                    parts.append(part_key)
+                manifest = {"filename": filename, "size": size, "parts": parts}
+                await write_with_retry(binding_name, f"{filename}.parts/manifest.json", json.dumps(manifest).encode("utf-8"))
+        print(f"Uploaded file to storage: {filename}")
+    except Exception as e:
+        print(f"Upload failed: {e}")
+
+
+async def write_with_retry(binding_name: str, key: str, data: bytes):
+    # retry transient failures with exponential backoff: 0.5s, 1s, 2s, ...
+    for attempt in range(UPLOAD_RETRIES):
+        try:
+            await get_dapr_client().invoke_binding(
                 binding_name=binding_name,
                 operation="create",
-                data=contents,
-                binding_metadata={"key": filename},
+                data=data,
+                binding_metadata={"key": key},
             )
-            print(f"Uploaded file to storage: {filename}")
-    except Exception as e:
-        print(f"Upload failed: {e}")
\ No newline at end of file
+            return
+        except grpc.RpcError as e:
+            if e.code() not in TRANSIENT_GRPC_CODES or attempt == UPLOAD_RETRIES - 1:
+                raise
+            delay = 0.5 * 2 ** attempt
+            print(f"Upload of {key} failed ({e.code().name}), retrying in {delay}s")
+            await asyncio.sleep(delay)
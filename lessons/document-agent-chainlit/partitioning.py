@@ -0,0 +1,22 @@
+import os
+import tempfile
+from typing import List, Tuple
+
+from pypdf import PdfReader, PdfWriter
+from unstructured.partition.pdf import partition_pdf
+
+
+def partition_pages(path: str, start: int, end: int) -> List[Tuple[str, str]]:
+    # runs in a worker process: partition only pages [start, end) of the PDF.
+    # Kept out of app.py so spawned workers import only this, not the chat app
+    reader = PdfReader(path)
+    writer = PdfWriter()
+    for page in reader.pages[start:end]:
+        writer.add_page(page)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        writer.write(tmp)
+    try:
+        elements = partition_pdf(filename=tmp.name, starting_page_number=start + 1)
+    finally:
+        os.remove(tmp.name)
+    return [(el.category, el.text.strip()) for el in elements if el.text and el.text.strip()]
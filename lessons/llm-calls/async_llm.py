@@ -0,0 +1,85 @@
+"""
+Async-native chat clients.
+
+`llm.generate(...)` blocks the calling thread, so async apps have to hand
+it to a thread pool and concurrency is capped by the pool size. These
+clients talk to the provider with non-blocking I/O instead, so many
+conversations can share one event loop:
+
+- `agenerate(...)` returns the reply text, or a parsed model when
+  `response_format` is given
+- `astream(...)` is an async iterator over the reply's content deltas
+
+Cancelling the awaiting task (e.g. with `asyncio.wait_for`) aborts the
+request and closes its connection or stream.
+"""
+
+import os
+from typing import AsyncIterator, Dict, List, Optional, Type, Union
+
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+
+Messages = Union[str, List[Dict[str, str]]]
+
+
+def to_messages(messages: Messages) -> List[Dict[str, str]]:
+    return [{"role": "user", "content": messages}] if isinstance(messages, str) else list(messages)
+
+
+class AsyncOpenAIChatClient:
+    """Async counterpart of OpenAIChatClient"""
+
+    def __init__(self, model: str = "gpt-4o", api_key: Optional[str] = None, base_url: Optional[str] = None, max_retries: int = 2):
+        self.model = model
+        self.client = AsyncOpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"), base_url=base_url, max_retries=max_retries)
+
+    async def agenerate(self, messages: Messages, response_format: Optional[Type[BaseModel]] = None, **kwargs):
+        if response_format is not None:
+            completion = await self.client.beta.chat.completions.parse(
+                model=self.model, messages=to_messages(messages), response_format=response_format, **kwargs
+            )
+            return completion.choices[0].message.parsed
+        completion = await self.client.chat.completions.create(model=self.model, messages=to_messages(messages), **kwargs)
+        return completion.choices[0].message.content
+
+    async def astream(self, messages: Messages, **kwargs) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.model, messages=to_messages(messages), stream=True, **kwargs
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # runs on normal completion, early break and cancellation alike
+            await stream.close()
+
+    async def aclose(self):
+        await self.client.close()
+
+
+class AsyncDaprChatClient:
+    """Async counterpart of DaprChatClient, using the async Dapr gRPC client"""
+
+    def __init__(self, component_name: Optional[str] = None):
+        self.component_name = component_name or os.getenv("DAPR_LLM_COMPONENT_DEFAULT")
+        self.client = None
+
+    async def agenerate(self, messages: Messages, **kwargs) -> str:
+        from dapr.aio.clients import DaprClient
+        from dapr.clients.grpc._request import ConversationInput
+
+        if self.client is None:
+            self.client = DaprClient()
+        inputs = [ConversationInput(content=m["content"], role=m["role"]) for m in to_messages(messages)]
+        response = await self.client.converse_alpha1(name=self.component_name, inputs=inputs, **kwargs)
+        return response.outputs[0].result
+
+    async def astream(self, messages: Messages, **kwargs) -> AsyncIterator[str]:
+        # The Dapr conversation API does not stream; yield the whole reply as one chunk
+        yield await self.agenerate(messages, **kwargs)
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.close()
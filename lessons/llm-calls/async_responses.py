@@ -0,0 +1,47 @@
+from dotenv import load_dotenv
+from pydantic import BaseModel
+from async_llm import AsyncOpenAIChatClient
+import asyncio
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+load_dotenv()
+
+class Book(BaseModel):
+    title: str
+    author: str
+    genre: str
+
+async def main():
+    llm = AsyncOpenAIChatClient()
+
+    # Many conversations share one event loop, with no thread per request
+    questions = [
+        "Give me a recipe for cheesecake in one sentence",
+        "Name a New York Times bestselling book",
+        "What is Dapr, in one sentence?",
+    ]
+    answers = await asyncio.gather(*[llm.agenerate(q) for q in questions])
+    for question, answer in zip(questions, answers):
+        print(f"Q: {question}\nA: {answer}\n")
+
+    # Structured output
+    book: Book = await llm.agenerate("Give me a New York Times bestselling book", response_format=Book)
+    print(book.model_dump_json(indent=2))
+
+    # Async streaming
+    async for content in llm.astream("Give me a New York Times bestselling book"):
+        print(content, end="", flush=True)
+    print()
+
+    # Cancellation: a slow reply is abandoned after two seconds
+    try:
+        await asyncio.wait_for(llm.agenerate("Write a 2000 word essay on distributed systems"), timeout=2)
+    except asyncio.TimeoutError:
+        print("Request cancelled after 2 seconds")
+
+    await llm.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
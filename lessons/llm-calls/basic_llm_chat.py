@@ -12,8 +12,7 @@ response: LLMChatResponse = llm.generate("Give me a recipe for cheesecake")
 if response.get_message() is not None:
     print("Response: ", response.get_message().content)
 
-# Chat completion with user input
-llm = DaprChatClient()
+# Chat completion with user input, reusing the same client
 response: LLMChatResponse = llm.generate(messages=[UserMessage("hello there!")])
 
 if (
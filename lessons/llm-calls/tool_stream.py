@@ -0,0 +1,104 @@
+"""
+Streaming tool-call assembly and dispatch.
+
+Tool calls arrive from a streamed completion as deltas: the first delta for
+an index carries the call id and function name, later ones carry fragments
+of the arguments JSON. `StreamingToolDispatcher` rebuilds each call, and as
+soon as its arguments form valid JSON submits it to a thread pool, so tools
+run while the rest of the stream is still being generated.
+"""
+
+import json
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ToolRegistry:
+    """Look up `@tool` functions by the name the LLM sees"""
+
+    def __init__(self, tools: List[Any]):
+        self.tools = {tool.name: tool for tool in tools}
+
+    def definitions(self) -> List[Dict[str, Any]]:
+        """Tool definitions to pass as `tools=` to `llm.generate`"""
+        return [tool.to_function_call() for tool in self.tools.values()]
+
+    def run(self, name: str, arguments: Dict[str, Any]) -> Any:
+        if name not in self.tools:
+            return f"Unknown function: {name}"
+        return self.tools[name].run(**arguments)
+
+
+class StreamingToolDispatcher:
+    """Assemble tool calls from streamed deltas and run each one once it is complete"""
+
+    def __init__(self, registry: ToolRegistry, max_workers: int = 4):
+        self.registry = registry
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.calls: Dict[int, Dict[str, Any]] = {}
+        self.futures: Dict[int, Future] = {}
+
+    def feed(self, tool_call_deltas) -> List[Dict[str, Any]]:
+        """Add the tool call deltas of one chunk, returning any calls that just completed"""
+        completed = []
+        for delta in tool_call_deltas or []:
+            call = self.calls.setdefault(delta.index, {
+                "id": delta.id,
+                "type": "function",
+                "function": {"name": "", "arguments": ""},
+            })
+            if delta.id:
+                call["id"] = delta.id
+            if delta.function.name:
+                call["function"]["name"] = delta.function.name
+            if delta.function.arguments:
+                call["function"]["arguments"] += delta.function.arguments
+            if self._try_submit(delta.index):
+                completed.append(call)
+        return completed
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Submit anything still pending once the stream has ended"""
+        for index in self.calls:
+            self._try_submit(index, final=True)
+        return [self.calls[index] for index in sorted(self.calls)]
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Wait for every tool and return tool messages in call order"""
+        messages = []
+        for index in sorted(self.calls):
+            call = self.calls[index]
+            try:
+                if index not in self.futures:
+                    raise ValueError(f"invalid arguments: {call['function']['arguments']!r}")
+                content = self.futures[index].result()
+            except Exception as e:
+                logger.exception("Tool %s failed", call["function"]["name"])
+                content = f"Error: {e}"
+            messages.append({"role": "tool", "tool_call_id": call["id"], "content": str(content)})
+        self.executor.shutdown(wait=False)
+        return messages
+
+    def _try_submit(self, index: int, final: bool = False) -> bool:
+        if index in self.futures:
+            return False
+        call = self.calls[index]
+        arguments = parse_arguments(call["function"]["arguments"], final)
+        if arguments is None or not call["function"]["name"]:
+            return False
+        logger.info("Dispatching %s(%s) while the stream continues", call["function"]["name"], arguments)
+        self.futures[index] = self.executor.submit(self.registry.run, call["function"]["name"], arguments)
+        return True
+
+
+def parse_arguments(arguments: str, final: bool = False) -> Optional[Dict[str, Any]]:
+    """Return the parsed arguments once the JSON object has closed, else None"""
+    if not arguments.rstrip().endswith("}"):
+        return {} if final and not arguments.strip() else None
+    try:
+        return json.loads(arguments)
+    except json.JSONDecodeError:
+        return None
@@ -1,4 +1,5 @@
 from mcp.server.fastmcp import FastMCP
+from typing import List
 import random
 
 mcp = FastMCP("TestStockServer")
@@ -7,4 +8,12 @@ mcp = FastMCP("TestStockServer")
 def get_stock_price(symbol: str) -> str:
     """Get current stock price for a given symbol"""
     price = round(random.uniform(100, 500), 2)
-    return f"The current price of {symbol.upper()} is ${price}"
\ No newline at end of file
+    return f"The current price of {symbol.upper()} is ${price}"
+
+@mcp.tool()
+def get_stock_prices(symbols: List[str]) -> str:
+    """Get current stock prices for several symbols at once"""
+    return "\n".join(
+        f"The current price of {symbol.upper()} is ${round(random.uniform(100, 500), 2)}"
+        for symbol in symbols
+    )
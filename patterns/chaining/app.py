@@ -1,12 +1,14 @@
+import json
 import logging
 from dapr_agents.workflow import WorkflowApp, workflow, task
-from dapr_agents.llm import OpenAIChatClient
-from dapr.ext.workflow import DaprWorkflowContext
+from dapr.ext.workflow import DaprWorkflowClient, DaprWorkflowContext, when_any
 from dapr_agents import tool, Agent
 from pydantic import BaseModel, Field
 from typing import List
 from dotenv import load_dotenv
 
+from llm_clients import get_openai_chat_client, pool_stats
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
@@ -53,7 +55,8 @@ resume_agent = Agent(
         "Use the match_skills tool to align user skills with role requirements",
         "Structure the resume into sections: Summary, Skills, Experience"
     ],
-    tools=[match_skills]
+    tools=[match_skills],
+    llm=get_openai_chat_client()
 )
 
 cover_letter_agent = Agent(
@@ -63,7 +66,8 @@ cover_letter_agent = Agent(
     instructions=[
         "Use the resume outline to craft a compelling narrative",
         "Highlight strengths and express enthusiasm for the role"
-    ]
+    ],
+    llm=get_openai_chat_client()
 )
 
 @workflow(name="job_application_workflow")
@@ -90,6 +94,170 @@ def job_application_workflow(ctx: DaprWorkflowContext, user_input: str):
 
     return letter
 
+# Speculative chain: the resume agent starts as soon as role and skills have
+# streamed in, while the rest of the profile is still being generated
+PARTIAL_PROFILE_EVENT = "partial_profile"
+
+@workflow(name="speculative_job_application_workflow")
+def speculative_job_application_workflow(ctx: DaprWorkflowContext, user_input: str):
+    # 1) Stream the profile; the activity raises PARTIAL_PROFILE_EVENT once role and skills are parsed
+    profile_task = ctx.call_activity(
+        stream_user_profile, input={"user_input": user_input, "instance_id": ctx.instance_id}
+    )
+    partial_event = ctx.wait_for_external_event(PARTIAL_PROFILE_EVENT)
+    first = yield when_any([partial_event, profile_task])
+
+    # 2) Speculatively start the resume outline from the partial profile; the
+    # goal is not part of its prompt, so role and skills alone decide whether it holds
+    speculative_task = None
+    partial = None
+    if first == partial_event:
+        partial = partial_event.get_result()
+        logging.info("Step 1 – Partial Profile (speculating):\n%s", partial)
+        speculative_task = ctx.call_activity(
+            generate_role_resume_outline,
+            input={"role": partial["role"], "skills": partial["skills"]}
+        )
+
+    profile = yield profile_task
+    logging.info("Step 1 – Extracted Profile:\n%s", profile)
+
+    # 3) Validation gate: keep the speculative outline only if role and skills did not change
+    if speculative_task is not None and same_role_and_skills(partial, profile):
+        resume_result = yield speculative_task
+    else:
+        if speculative_task is not None:
+            logging.info("Final profile differs from the partial one; rerunning the resume outline")
+        resume_result = yield ctx.call_activity(generate_resume_outline, input=profile)
+
+    resume_info = resume_result.get('content', resume_result) if isinstance(resume_result, dict) else resume_result
+    logging.info("Step 2 – Resume Info:\n%s", resume_info)
+
+    # 4) A speculative outline was written without the goal, so hand it to the cover letter
+    letter_result = yield ctx.call_activity(
+        write_cover_letter, input={"resume_info": f"{resume_info}\n\nCareer goal: {profile['goal']}"}
+    )
+    letter = letter_result.get('content', letter_result) if isinstance(letter_result, dict) else letter_result
+    logging.info("Step 3 – Cover Letter:\n%s", letter)
+
+    return letter
+
+def same_role_and_skills(partial: dict, profile: dict) -> bool:
+    def normalize(value) -> str:
+        return str(value).strip().lower()
+
+    def skill_set(skills) -> set:
+        return {normalize(s) for s in (skills if isinstance(skills, list) else [skills])}
+
+    return (
+        normalize(partial["role"]) == normalize(profile["role"])
+        and skill_set(partial["skills"]) == skill_set(profile["skills"])
+    )
+
+PROFILE_PROMPT = (
+    "Extract the user's target role, relevant skills and career goal. Reply with a JSON object "
+    'with the keys in this order: "role" (string), "skills" (list of strings), "goal" (string).'
+)
+
+class PartialJSONObject:
+    """
+    Incremental parser for a JSON object streamed in chunks.
+
+    Each top-level member is decoded with the standard JSON decoder as soon
+    as its value is complete, so brackets or quotes inside strings can't
+    end a value early. Parsing resumes after the last complete member.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.members = {}
+        self._decoder = json.JSONDecoder()
+        self._pos = None
+        self._not_object = False
+
+    def feed(self, text: str) -> dict:
+        """Add a chunk and return every member completed so far"""
+        self.buffer += text
+        if self._not_object:
+            return self.members
+        if self._pos is None:
+            start = self._skip(0)
+            if start >= len(self.buffer):
+                return self.members
+            if self.buffer[start] != "{":
+                # Not an object: nothing to report early, the final validation will reject it
+                self._not_object = True
+                return self.members
+            self._pos = start + 1
+        while True:
+            pos = self._skip(self._pos)
+            if pos < len(self.buffer) and self.buffer[pos] == ",":
+                pos = self._skip(pos + 1)
+            try:
+                key, pos = self._decoder.raw_decode(self.buffer, pos)
+                pos = self._skip(pos)
+                if not isinstance(key, str) or pos >= len(self.buffer) or self.buffer[pos] != ":":
+                    return self.members
+                value, pos = self._decoder.raw_decode(self.buffer, self._skip(pos + 1))
+            except json.JSONDecodeError:
+                # Member not complete yet (or the object is closed)
+                return self.members
+            # A number or literal may continue in the next chunk, so wait for what follows it
+            end = self._skip(pos)
+            if end >= len(self.buffer) or self.buffer[end] not in ",}":
+                return self.members
+            self.members[key] = value
+            self._pos = end
+
+    def _skip(self, pos: int) -> int:
+        while pos < len(self.buffer) and self.buffer[pos] in " \t\r\n":
+            pos += 1
+        return pos
+
+def parse_partial_profile(members: dict):
+    """Return role and skills once both are complete in the streamed JSON, else None"""
+    if "role" not in members or "skills" not in members:
+        return None
+    return {"role": members["role"], "skills": members["skills"]}
+
+_workflow_client = None
+
+@task
+def stream_user_profile(user_input: str, instance_id: str) -> dict:
+    global _workflow_client
+    llm = get_openai_chat_client()
+    stream = llm.client.chat.completions.create(
+        model=llm.model,
+        messages=[
+            {"role": "system", "content": PROFILE_PROMPT},
+            {"role": "user", "content": user_input}
+        ],
+        response_format={"type": "json_object"},
+        stream=True
+    )
+
+    profile_json = PartialJSONObject()
+    partial_sent = False
+    for chunk in stream:
+        if not (chunk.choices and chunk.choices[0].delta.content):
+            continue
+        members = profile_json.feed(chunk.choices[0].delta.content)
+        if not partial_sent:
+            partial = parse_partial_profile(members)
+            if partial:
+                # Speculation is only an optimization: if the event can't be raised,
+                # the workflow carries on with the full profile this activity returns
+                partial_sent = True
+                try:
+                    if _workflow_client is None:
+                        _workflow_client = DaprWorkflowClient()
+                    _workflow_client.raise_workflow_event(instance_id, PARTIAL_PROFILE_EVENT, data=partial)
+                except Exception as e:
+                    logging.warning("Could not raise %s for %s, skipping speculation: %s", PARTIAL_PROFILE_EVENT, instance_id, e)
+                    _workflow_client = None
+
+    return UserProfile.model_validate_json(profile_json.buffer).model_dump()
+
 @task(description="Extract the user's target role and relevant skills from the provided input.")
 def extract_user_profile(user_input: str) -> UserProfile:
     # Implementation is handled by the LLM (prompt‐based)
@@ -100,14 +268,19 @@ def generate_resume_outline(role: str, skills: List[str], goal: str):
     # No return type annotation to avoid validation issues with agent responses
     pass
 
+@task(agent=resume_agent, description="Generate a resume outline for the role: {role}, with skills: {skills}. Use the match_skills tool to align skills with the role. Return a clear summary, list of relevant skills, and experience highlights.")
+def generate_role_resume_outline(role: str, skills: List[str]):
+    # Same as generate_resume_outline without the goal, for outlines started before it is known
+    pass
+
 @task(agent=cover_letter_agent, description="Write a personalized cover letter based on the resume information: {resume_info}. Make it enthusiastic, concise, and role-focused.")
 def write_cover_letter(resume_info: str):
     # No return type annotation to avoid validation issues with agent responses
     pass
 
 def main():
-    # Create WorkflowApp with LLM client
-    wfapp = WorkflowApp(llm=OpenAIChatClient())
+    # Create WorkflowApp with the same pooled LLM client the agents use
+    wfapp = WorkflowApp(llm=get_openai_chat_client())
     
     logging.info("Starting job application workflow...")
     
@@ -117,10 +290,12 @@ def main():
         "I have experience in Python, cloud infrastructure, and team leadership."
     )
     
-    # Run the workflow
-    result = wfapp.run_and_monitor_workflow_sync(job_application_workflow, user_input)
+    # Run the workflow; the resume outline starts while the profile is still
+    # streaming. Use job_application_workflow to run each step strictly in turn.
+    result = wfapp.run_and_monitor_workflow_sync(speculative_job_application_workflow, user_input)
     print("\n=== Final Cover Letter ===\n")
     print(result)
+    logging.info("LLM connection pool: %s", pool_stats())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Process-wide registry of LLM clients.
+
+Every Agent, DurableAgent and WorkflowApp in the process asks the registry
+for its chat client instead of constructing one, so they all reuse one
+client per provider endpoint. OpenAI clients are built on one pooled,
+keep-alive HTTP/2 connection set whose size is bounded by `httpx.Limits`.
+The time requests spend waiting in that pool for a connection is read
+from httpcore's trace events and reported by `pool_stats()`, so undersized
+pools show up without adding a limiter of our own.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+from dapr_agents.llm import DaprChatClient, OpenAIChatClient
+from dapr_agents.llm.utils import HTTPHelper
+from dapr_agents.types.llm import OpenAIClientConfig
+from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_clients: Dict[Tuple, object] = {}
+_transport: Optional["MeteredTransport"] = None
+_http_client: Optional[httpx.Client] = None
+
+MAX_CONNECTIONS = 20
+HTTP2 = True
+
+
+# httpcore trace events that mean a request has its connection: a new one is
+# being opened, or an idle or multiplexed one starts sending
+_CONNECTION_ACQUIRED = (
+    "connection.connect_tcp.started",
+    "connection.connect_unix_socket.started",
+    "http11.send_request_headers.started",
+    "http2.send_request_headers.started",
+)
+
+
+class MeteredTransport(httpx.HTTPTransport):
+    """Keep-alive transport that records how long requests wait for a pooled connection"""
+
+    def __init__(self, max_connections: int, http2: bool):
+        super().__init__(
+            http2=http2,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        acquired_at = []
+        outer_trace = request.extensions.get("trace")
+
+        def trace(event_name, info):
+            if not acquired_at and event_name in _CONNECTION_ACQUIRED:
+                acquired_at.append(time.perf_counter())
+            if outer_trace is not None:
+                outer_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        try:
+            return super().handle_request(request)
+        finally:
+            # a request that failed before getting a connection waited the whole time
+            self._record_wait((acquired_at[0] if acquired_at else time.perf_counter()) - started)
+
+    def _record_wait(self, wait: float):
+        with self._stats_lock:
+            self.requests += 1
+            if wait > 0.001:
+                self.waited += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+
+class PooledOpenAIChatClient(OpenAIChatClient):
+    """OpenAIChatClient whose SDK client is built on the shared HTTP pool"""
+
+    def get_client(self) -> OpenAI:
+        config = self.config
+        if not isinstance(config, OpenAIClientConfig):
+            logger.warning("The shared HTTP pool only covers OpenAI endpoints; Azure clients use their own connections")
+            return super().get_client()
+        kwargs = {
+            k: v
+            for k, v in (
+                ("api_key", config.api_key),
+                ("base_url", config.base_url),
+                ("organization", config.organization),
+                ("project", config.project),
+            )
+            if v is not None
+        }
+        return OpenAI(**kwargs, timeout=HTTPHelper.configure_timeout(self.timeout), http_client=_shared_http_client())
+
+
+def configure_pool(max_connections: int = MAX_CONNECTIONS, http2: bool = HTTP2):
+    """Set the pool size before the first client is created"""
+    global MAX_CONNECTIONS, HTTP2
+    with _lock:
+        if _http_client is not None:
+            raise RuntimeError("The shared HTTP pool is already in use")
+        MAX_CONNECTIONS, HTTP2 = max_connections, http2
+
+
+def _shared_http_client() -> httpx.Client:
+    # called with _lock held, from get_openai_chat_client
+    global _transport, _http_client
+    if _http_client is None:
+        _transport = MeteredTransport(max_connections=MAX_CONNECTIONS, http2=HTTP2)
+        _http_client = httpx.Client(transport=_transport, timeout=httpx.Timeout(600.0, connect=5.0))
+    return _http_client
+
+
+def get_openai_chat_client(model: Optional[str] = None, base_url: Optional[str] = None) -> OpenAIChatClient:
+    """Return the process-wide OpenAIChatClient for this model and endpoint"""
+    key = ("openai", model, base_url)
+    with _lock:
+        if key not in _clients:
+            kwargs = {k: v for k, v in (("model", model), ("base_url", base_url)) if v}
+            _clients[key] = PooledOpenAIChatClient(**kwargs)
+        return _clients[key]
+
+
+def get_dapr_chat_client() -> DaprChatClient:
+    """Return the process-wide DaprChatClient (one gRPC channel to the sidecar)"""
+    key = ("dapr",)
+    with _lock:
+        if key not in _clients:
+            _clients[key] = DaprChatClient()
+        return _clients[key]
+
+
+def pool_stats() -> dict:
+    if _transport is None:
+        return {"requests": 0}
+    with _transport._stats_lock:
+        return {
+            "clients": len(_clients),
+            "max_connections": MAX_CONNECTIONS,
+            "requests": _transport.requests,
+            "requests_that_waited": _transport.waited,
+            "avg_wait_ms": 1000 * _transport.wait_seconds / _transport.requests if _transport.requests else 0.0,
+            "max_wait_ms": 1000 * _transport.max_wait_seconds,
+        }
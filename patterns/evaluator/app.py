@@ -5,13 +5,23 @@ Evaluator-Optimizer Pattern: Recipe Refinement
 1. Generator LLM creates or refines a recipe
 2. Evaluator LLM scores the recipe and returns feedback
 3. Loop until the recipe meets criteria or max iterations reached
+
+parallel_recipe_refinement_workflow drafts several candidates per round,
+evaluates them concurrently and keeps the best one, stopping early on a
+score threshold, a plateau or a time/token budget.
+
+incremental_recipe_refinement_workflow keeps the full draft in workflow
+state and only sends the sections that still score below a threshold, with
+a few open feedback items per section, each tracked by ID until the
+evaluator confirms it was addressed. It stops once every section passes or
+a round improves none of them.
 """
 
 import logging
 import json
-from typing import List
+from typing import Dict, List, Optional
 from dapr_agents.workflow import WorkflowApp, workflow, task
-from dapr.ext.workflow import DaprWorkflowContext
+from dapr.ext.workflow import DaprWorkflowContext, when_all
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
@@ -21,6 +31,23 @@ class Evaluation(BaseModel):
     feedback: List[str] = Field(..., description="Concrete suggestions for improvement")
     meets_criteria: bool = Field(..., description="True if recipe satisfies all criteria")
 
+# Models for section-by-section refinement
+class RecipeSection(BaseModel):
+    title: str = Field(..., description="Section name, e.g. Ingredients or Steps")
+    content: str = Field(..., description="Section text")
+
+class RecipeDraft(BaseModel):
+    sections: List[RecipeSection] = Field(..., description="Recipe sections, in order")
+
+class SectionReview(BaseModel):
+    title: str = Field(..., description="Title of the section being reviewed, exactly as given")
+    score: int = Field(..., description="Quality score from 1–10")
+    feedback: List[str] = Field(..., description="Concrete suggestions for this section")
+    addressed: List[str] = Field(default_factory=list, description="IDs of the open feedback items this section now addresses, e.g. F3")
+
+class SectionEvaluation(BaseModel):
+    reviews: List[SectionReview] = Field(..., description="One review per section")
+
 @workflow(name="recipe_refinement_workflow")
 def recipe_refinement_workflow(ctx: DaprWorkflowContext, params: dict):
     request        = params["request"]        # e.g. “A healthy vegan breakfast”
@@ -67,6 +94,251 @@ def recipe_refinement_workflow(ctx: DaprWorkflowContext, params: dict):
         "final_score": evaluation.score if evaluation else 0
     }
 
+@workflow(name="parallel_recipe_refinement_workflow")
+def parallel_recipe_refinement_workflow(ctx: DaprWorkflowContext, params: dict):
+    request          = params["request"]
+    criteria         = params["criteria"]
+    max_rounds       = params.get("max_iterations", 3)
+    candidates       = params.get("candidates", 3)         # drafts generated per round
+    score_threshold  = params.get("score_threshold", 9)    # stop once the best draft scores this
+    plateau_rounds   = params.get("plateau_rounds", 1)     # stop after this many rounds without improvement
+    min_improvement  = params.get("min_improvement", 1)    # score gain that counts as improvement
+    time_budget      = params.get("time_budget_seconds")   # optional wall-clock budget
+    token_budget     = params.get("token_budget")          # optional, estimated at 4 characters per token
+
+    # Budgets are checked between rounds; a round that has started always finishes.
+    # ctx.current_utc_datetime is replay-safe, unlike time.time()
+    started = ctx.current_utc_datetime
+    tokens_used = 0
+    best_recipe: str = None
+    best: Evaluation = None
+    rounds = 0
+    stale_rounds = 0
+    stop_reason = "max_iterations"
+
+    while rounds < max_rounds:
+        rounds += 1
+        logging.info(f"✍️ Round {rounds}: drafting {candidates} candidates in parallel…")
+        feedback = best.feedback if best else None
+        drafts: List[str] = yield when_all([
+            ctx.call_activity(
+                generate_recipe_candidate,
+                input={"request": request, "previous": best_recipe, "feedback": feedback, "candidate": n}
+            )
+            for n in range(1, candidates + 1)
+        ])
+
+        logging.info(f"🧐 Round {rounds}: evaluating {len(drafts)} candidates…")
+        evaluation_results = yield when_all([
+            ctx.call_activity(evaluate_recipe, input={"recipe": draft, "criteria": criteria})
+            for draft in drafts
+        ])
+        evaluations = [
+            Evaluation(**result) if isinstance(result, dict) else result
+            for result in evaluation_results
+        ]
+
+        tokens_used += sum(
+            estimate_tokens(request, best_recipe, feedback, draft) + estimate_tokens(draft, criteria, evaluation.feedback)
+            for draft, evaluation in zip(drafts, evaluations)
+        )
+
+        # Keep the best draft seen so far, across rounds
+        round_best = max(range(len(drafts)), key=lambda i: evaluations[i].score)
+        logging.info(f"Round {rounds} scores: {[e.score for e in evaluations]}")
+        if best is None or evaluations[round_best].score >= best.score + min_improvement:
+            best_recipe, best = drafts[round_best], evaluations[round_best]
+            stale_rounds = 0
+        else:
+            stale_rounds += 1
+
+        if best.meets_criteria or best.score >= score_threshold:
+            stop_reason = "score_threshold"
+            break
+        if stale_rounds >= plateau_rounds:
+            stop_reason = "plateau"
+            break
+        if time_budget is not None and (ctx.current_utc_datetime - started).total_seconds() >= time_budget:
+            stop_reason = "time_budget"
+            break
+        if token_budget is not None and tokens_used >= token_budget:
+            stop_reason = "token_budget"
+            break
+
+    logging.info(f"Stopped after {rounds} rounds ({stop_reason}), best score {best.score}/10")
+    return {
+        "final_recipe": best_recipe,
+        "iterations": rounds,
+        "final_score": best.score,
+        "stop_reason": stop_reason,
+        "candidates_evaluated": rounds * candidates,
+        "estimated_tokens": tokens_used
+    }
+
+@workflow(name="incremental_recipe_refinement_workflow")
+def incremental_recipe_refinement_workflow(ctx: DaprWorkflowContext, params: dict):
+    request           = params["request"]
+    criteria          = params["criteria"]
+    max_iterations    = params.get("max_iterations", 3)
+    section_threshold = params.get("section_threshold", 8)  # sections scoring this are left alone
+    max_open_feedback = params.get("max_open_feedback", 3)  # open feedback items kept per section
+    final_check       = params.get("final_check", False)    # also evaluate the whole recipe once at the end
+
+    logging.info("🔄 Generating initial recipe draft…")
+    draft_result = yield ctx.call_activity(generate_recipe_sections, input={"request": request})
+
+    # The full draft, its section scores and the feedback still open on each
+    # section live in workflow state; the LLM only sees the sections in play.
+    # Feedback items get IDs, so the evaluator resolves them by ID, and at most
+    # max_open_feedback stay open per section, so prompts don't grow per round.
+    draft: Dict[str, str] = {s.title: s.content for s in to_model(RecipeDraft, draft_result).sections}
+    version = 1
+    scores: Dict[str, int] = {}
+    open_feedback: Dict[str, List[dict]] = {}
+    feedback_ids = 0
+    to_evaluate = list(draft)
+    tokens_per_iteration: List[int] = []
+    iteration = 0
+    stop_reason = "max_iterations"
+
+    while True:
+        iteration += 1
+        tokens = 0
+        unreviewed: List[str] = []
+        improved = False
+        if to_evaluate:
+            logging.info(f"🧐 Evaluating {len(to_evaluate)} sections of draft v{version} (iteration {iteration})…")
+            review_input = {"sections": render_sections(draft, to_evaluate, open_feedback), "criteria": criteria}
+            review_result = yield ctx.call_activity(evaluate_sections, input=review_input)
+            tokens += estimate_tokens(*review_input.values(), review_result)
+
+            # Reviews are matched to sections by title; sections without one are evaluated again
+            reviews = {section_key(r.title): r for r in to_model(SectionEvaluation, review_result).reviews}
+            for title in to_evaluate:
+                review = reviews.pop(section_key(title), None)
+                if review is None:
+                    unreviewed.append(title)
+                    continue
+                improved = improved or title not in scores or review.score > scores[title]
+                scores[title] = review.score
+                if review.score >= section_threshold:
+                    open_feedback.pop(title, None)
+                    continue
+                addressed = {feedback_id(item) for item in review.addressed}
+                still_open = [item for item in open_feedback.get(title, []) if item["id"] not in addressed]
+                known = {feedback_key(item["text"]) for item in still_open}
+                for text in review.feedback:
+                    if feedback_key(text) not in known:
+                        feedback_ids += 1
+                        still_open.append({"id": f"F{feedback_ids}", "text": text})
+                        known.add(feedback_key(text))
+                # Newest first: they describe the section as it reads now
+                open_feedback[title] = still_open[-max_open_feedback:]
+            if reviews:
+                logging.warning(f"Ignoring reviews for unknown sections: {sorted(reviews)}")
+            if unreviewed:
+                logging.warning(f"No review returned for: {unreviewed}")
+
+        logging.info(f"Section scores: {scores}")
+        needs_work = [title for title in draft if title in scores and scores[title] < section_threshold]
+        if not needs_work and not unreviewed:
+            stop_reason = "all_sections_pass"
+        elif iteration > 1 and not improved and not unreviewed:
+            # Revising again would resend the same sections with the same feedback
+            stop_reason = "plateau"
+        if stop_reason != "max_iterations" or iteration >= max_iterations:
+            tokens_per_iteration.append(tokens)
+            break
+
+        changed: List[str] = []
+        if needs_work:
+            logging.info(f"✍️ Revising {len(needs_work)} sections…")
+            feedback = {
+                title: [item["text"] for item in open_feedback.get(title, [])]
+                or [f"Raise this section's score from {scores[title]} to {section_threshold} or more"]
+                for title in needs_work
+            }
+            revise_input = {
+                "draft_version": version,
+                "sections": render_sections(draft, needs_work),
+                "feedback": render_feedback(feedback)
+            }
+            revised_result = yield ctx.call_activity(revise_sections, input=revise_input)
+            tokens += estimate_tokens(*revise_input.values(), revised_result)
+
+            # Merge the revised sections back into the draft held here, by title;
+            # a section that came back missing or unchanged is revised again next time
+            revised = {section_key(section.title): section for section in to_model(RecipeDraft, revised_result).sections}
+            for title in needs_work:
+                section = revised.pop(section_key(title), None)
+                if section is not None and section.content != draft[title]:
+                    draft[title] = section.content
+                    changed.append(title)
+            if revised:
+                logging.warning(f"Ignoring revised sections that were not asked for: {sorted(revised)}")
+            if changed:
+                version += 1
+        tokens_per_iteration.append(tokens)
+        to_evaluate = changed + unreviewed
+
+    logging.info(f"Stopped after {iteration} iterations ({stop_reason})")
+    final_recipe = render_sections(draft, list(draft))
+    result = {
+        "final_recipe": final_recipe,
+        "iterations": iteration,
+        "stop_reason": stop_reason,
+        # The weakest section bounds the recipe's quality
+        "final_score": min(scores.values()) if scores else 0,
+        "meets_criteria": bool(scores) and all(score >= section_threshold for score in scores.values()),
+        "section_scores": scores,
+        "draft_version": version,
+        "tokens_per_iteration": tokens_per_iteration,
+        "estimated_tokens": sum(tokens_per_iteration)
+    }
+    if final_check:
+        # Sections can each pass while the recipe as a whole still misses a criterion
+        logging.info("🧐 Evaluating the finished recipe as a whole…")
+        final_result = yield ctx.call_activity(evaluate_recipe, input={"recipe": final_recipe, "criteria": criteria})
+        final = to_model(Evaluation, final_result)
+        result.update({
+            "final_score": final.score,
+            "meets_criteria": final.meets_criteria,
+            "final_feedback": final.feedback,
+            "estimated_tokens": result["estimated_tokens"] + estimate_tokens(final_recipe, criteria, final_result),
+        })
+    return result
+
+def to_model(model, result):
+    """Handle case where the LLM result arrives as a dict instead of the model"""
+    return model(**result) if isinstance(result, dict) else result
+
+def section_key(title: str) -> str:
+    """Match section titles regardless of case, spacing or a leading heading marker"""
+    return " ".join(title.strip().lstrip("#").split()).lower()
+
+def render_sections(draft: Dict[str, str], titles: List[str], open_feedback: Optional[Dict[str, List[dict]]] = None) -> str:
+    rendered = []
+    for title in titles:
+        text = f"## {title}\n{draft[title]}"
+        if open_feedback and open_feedback.get(title):
+            text += "\nOpen feedback: " + "; ".join(f"[{item['id']}] {item['text']}" for item in open_feedback[title])
+        rendered.append(text)
+    return "\n\n".join(rendered)
+
+def feedback_id(text: str) -> str:
+    """Normalize an ID the evaluator echoes back, so "[f3]" matches F3"""
+    return text.strip().strip("[]").strip().upper()
+
+def feedback_key(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+def render_feedback(delta: Dict[str, List[str]]) -> str:
+    return "\n".join(f"{title}: {'; '.join(items)}" for title, items in delta.items())
+
+def estimate_tokens(*texts) -> int:
+    """Rough token count of the text sent to and returned by the LLM"""
+    return sum(len(str(text)) for text in texts if text) // 4
+
 @task(description="""
 Create or refine a recipe for: {request}
 If feedback is provided, incorporate it into the new version.
@@ -75,6 +347,17 @@ def generate_recipe(request: str, feedback: List[str] = None) -> str:
     # Implemented as an LLM prompt under the hood
     pass
 
+@task(description="""
+Write candidate recipe #{candidate} for: {request}
+Take a different approach from the other candidates.
+If a previous best recipe is provided, improve it using the feedback.
+Previous best recipe: {previous}
+Feedback: {feedback}
+""")
+def generate_recipe_candidate(request: str, previous: str = None, feedback: List[str] = None, candidate: int = 1) -> str:
+    # Implemented as an LLM prompt under the hood
+    pass
+
 @task(description="""
 Evaluate the given recipe against these criteria: {criteria}
 Return a score, actionable feedback, and a meets_criteria flag.
@@ -84,6 +367,36 @@ def evaluate_recipe(recipe: str, criteria: str) -> Evaluation:
     # Implemented as an LLM prompt under the hood
     pass
 
+@task(description="""
+Write a recipe for: {request}
+Split it into short titled sections, e.g. Ingredients, Steps, Nutrition.
+""")
+def generate_recipe_sections(request: str) -> RecipeDraft:
+    # Implemented as an LLM prompt under the hood
+    pass
+
+@task(description="""
+Score each recipe section from 1–10 against: {criteria}
+Return one review per section, with its title exactly as given and concrete fixes.
+If a section lists open feedback, put the IDs of the items it now addresses in addressed,
+and only give feedback that is not already open.
+{sections}
+""")
+def evaluate_sections(sections: str, criteria: str) -> SectionEvaluation:
+    # Only the sections changed since the last evaluation are sent
+    pass
+
+@task(description="""
+Revise these sections of recipe draft v{draft_version}, applying the feedback.
+Return only these sections, with their titles unchanged.
+{sections}
+Feedback:
+{feedback}
+""")
+def revise_sections(draft_version: int, sections: str, feedback: str) -> RecipeDraft:
+    # Only the sections that need work and their new feedback are sent
+    pass
+
 def main():
     load_dotenv()
     logging.basicConfig(level=logging.INFO)
@@ -93,12 +406,18 @@ def main():
     params = {
         "request": "A healthy vegan breakfast recipe",
         "criteria": "high protein, low sugar, easy ingredients",
-        "max_iterations": 2
+        "max_iterations": 2,
+        "candidates": 3,
+        "score_threshold": 9,
+        "time_budget_seconds": 120
     }
 
+    # Draft 3 candidates per round and keep the best; use
+    # recipe_refinement_workflow to refine a single draft at a time, or
+    # incremental_recipe_refinement_workflow to only resend changed sections
     print("\n=== EVALUATOR-OPTIMIZER PATTERN: RECIPE REFINEMENT ===")
     result = wfapp.run_and_monitor_workflow_sync(
-        recipe_refinement_workflow, input=params
+        parallel_recipe_refinement_workflow, input=params
     )
 
     # Handle different result types
@@ -115,6 +434,8 @@ def main():
         print("\nFinal Recipe (score: {0}/10 after {1} iterations):\n{2}".format(
             result["final_score"], result["iterations"], result["final_recipe"]
         ))
+        if "stop_reason" in result:
+            print(f"Stop reason: {result['stop_reason']}")
         print("\nRecipe Refinement completed successfully!")
     else:
         print("\nWorkflow failed to complete.")
@@ -3,7 +3,7 @@
 Orchestrator-Workers Pattern: Conference Planner
 
 1. Central orchestrator analyzes the request and creates subtasks
-2. Each subtask is delegated to a worker LLM
+2. Each subtask is delegated to a worker LLM (sequentially, or fanned out in parallel)
 3. Synthesizer LLM merges all worker outputs into a final conference plan
 """
 
@@ -11,7 +11,7 @@ import logging
 from typing import List, Dict, Any
 
 from dapr_agents.workflow import WorkflowApp, workflow, task
-from dapr.ext.workflow import DaprWorkflowContext
+from dapr.ext.workflow import DaprWorkflowContext, when_all
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
@@ -31,6 +31,10 @@ class OrchestratorPlan(BaseModel):
 @workflow(name="conference_planning_workflow")
 def conference_planning_workflow(ctx: DaprWorkflowContext, params: dict):
     request = params.get("request")
+    dispatch_mode = params.get("dispatch_mode", "parallel")
+    max_in_flight = params.get("max_in_flight")
+    if max_in_flight is not None and max_in_flight < 1:
+        raise ValueError(f"max_in_flight must be at least 1, got {max_in_flight}")
     logging.info(f"Orchestrator received request:\n{request}")
 
     # Step 1: Orchestrator creates a task list
@@ -48,14 +52,33 @@ def conference_planning_workflow(ctx: DaprWorkflowContext, params: dict):
     logging.info(f"Orchestrator generated {len(plan.tasks)} subtasks")
 
     # Step 2: Dispatch each subtask to a worker LLM
+    max_in_flight = max_in_flight or len(plan.tasks) or 1
     worker_outputs: List[Dict[str, Any]] = []
-    for task in plan.tasks:
-        logging.info(f"→ Dispatching task {task.task_id}: {task.description}")
-        result: str = yield ctx.call_activity(
-            execute_task,
-            input={"task": task.model_dump()}
-        )
-        worker_outputs.append({"task_id": task.task_id, "result": result})
+
+    if dispatch_mode == "sequential":
+        for task in plan.tasks:
+            logging.info(f"→ Dispatching task {task.task_id}: {task.description}")
+            result: str = yield ctx.call_activity(
+                execute_task,
+                input={"task": task.model_dump()}
+            )
+            worker_outputs.append({"task_id": task.task_id, "result": result})
+    else:
+        # Fan out in waves of at most `max_in_flight` workers; when_all keeps
+        # results in the same order as the tasks were scheduled. These are
+        # waves, not a sliding window: one slow worker holds up its whole wave
+        for start in range(0, len(plan.tasks), max_in_flight):
+            batch = plan.tasks[start:start + max_in_flight]
+            for task in batch:
+                logging.info(f"→ Dispatching task {task.task_id}: {task.description}")
+            results: List[str] = yield when_all([
+                ctx.call_activity(execute_task, input={"task": task.model_dump()})
+                for task in batch
+            ])
+            worker_outputs.extend(
+                {"task_id": task.task_id, "result": result}
+                for task, result in zip(batch, results)
+            )
 
     # Step 3: Synthesize all worker results into one conference plan
     final_plan: str = yield ctx.call_activity(
@@ -114,7 +137,11 @@ def main():
 
     final_plan = wfapp.run_and_monitor_workflow_sync(
         conference_planning_workflow,
-        input={"request": complex_request}
+        input={
+            "request": complex_request,
+            "dispatch_mode": "parallel",  # or "sequential"
+            "max_in_flight": 5
+        }
     )
 
     print("\n=== FINAL CONFERENCE PLAN ===")
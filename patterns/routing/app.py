@@ -5,10 +5,12 @@ from enum import Enum
 from typing import Optional
 
 from dapr_agents.workflow import WorkflowApp, workflow, task
-from dapr.ext.workflow import DaprWorkflowContext
+from dapr.ext.workflow import DaprWorkflowContext, when_all, when_any
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
+from response_cache import CachedChatClient, ResponseCache
+
 # configure a console logger
 console = logging.getLogger("console")
 handler = logging.StreamHandler(sys.stdout)
@@ -47,14 +49,8 @@ def it_support_batch_workflow(ctx: DaprWorkflowContext, tickets: list):
             input={"query": user_query}
         )
         
-        # Extract from response content if it's a response object
-        if hasattr(decision_response, 'content'):
-            decision_data = decision_response.content
-        else:
-            decision_data = decision_response
-        
-        # Create RoutingDecision from the data
-        decision = RoutingDecision(**decision_data)
+        # Create RoutingDecision from the response data
+        decision = RoutingDecision(**extract_content(decision_response))
         qtype = decision.query_type
         console.info(f"Classified as: {qtype} ({decision.reason})")
 
@@ -68,17 +64,8 @@ def it_support_batch_workflow(ctx: DaprWorkflowContext, tickets: list):
         else:
             handler_response = yield ctx.call_activity(handle_other, input={"query": user_query})
         
-        # Extract response content
-        if hasattr(handler_response, 'content'):
-            resp = handler_response.content
-        else:
-            resp = handler_response
-
-        # print to console for visibility
-        print("\n" + "*" * 60)
-        print(f"TICKET #{idx} RESPONSE ({qtype.upper()}):")
-        print(resp)
-        print("*" * 60 + "\n")
+        resp = extract_content(handler_response)
+        print_ticket_response(idx, qtype, resp)
 
         results.append({
             "ticket_number": idx,
@@ -89,6 +76,112 @@ def it_support_batch_workflow(ctx: DaprWorkflowContext, tickets: list):
 
     return results
 
+@workflow(name="it_support_parallel_batch_workflow")
+def it_support_parallel_batch_workflow(ctx: DaprWorkflowContext, params: dict):
+    tickets = params["tickets"]
+    max_classifying = params.get("max_classifying", 20)
+    max_per_category = params.get("max_per_category", 5)
+    # Offset of the first ticket when this batch is a shard of a larger one
+    ticket_offset = params.get("ticket_offset", 0)
+    if max_classifying < 1 or max_per_category < 1:
+        raise ValueError("max_classifying and max_per_category must be at least 1")
+
+    # Every ticket is classified and then handled, with at most
+    # `max_classifying` classifications in flight and at most
+    # `max_per_category` tickets per handler. Each slot is refilled as soon as
+    # its task finishes, so a slow category never holds up the others.
+    unclassified = list(range(ticket_offset + 1, ticket_offset + len(tickets) + 1))
+    queues = {qtype: [] for qtype in QueryType}
+    handling = {qtype: 0 for qtype in QueryType}
+    classifying = 0
+    in_flight = {}  # task -> (ticket number, category or None while classifying)
+    results = []
+
+    def query(idx):
+        return tickets[idx - ticket_offset - 1]
+
+    def fill_slots():
+        nonlocal classifying
+        while unclassified and classifying < max_classifying:
+            idx = unclassified.pop(0)
+            in_flight[ctx.call_activity(route_query, input={"query": query(idx)})] = (idx, None)
+            classifying += 1
+        for qtype, queue in queues.items():
+            while queue and handling[qtype] < max_per_category:
+                idx = queue.pop(0)
+                in_flight[ctx.call_activity(HANDLERS[qtype], input={"query": query(idx)})] = (idx, qtype)
+                handling[qtype] += 1
+
+    console.info(f"\nProcessing {len(tickets)} tickets...")
+    fill_slots()
+    while in_flight:
+        finished = yield when_any(list(in_flight))
+        idx, qtype = in_flight.pop(finished)
+
+        if qtype is None:
+            classifying -= 1
+            decision = RoutingDecision(**extract_content(finished.get_result()))
+            console.info(f"Ticket #{idx} classified as: {decision.query_type} ({decision.reason})")
+            queues[decision.query_type].append(idx)
+        else:
+            handling[qtype] -= 1
+            resp = extract_content(finished.get_result())
+            print_ticket_response(idx, qtype, resp)
+            results.append({
+                "ticket_number": idx,
+                "query": query(idx),
+                "type": qtype.value,
+                "response": resp
+            })
+        fill_slots()
+
+    return sorted(results, key=lambda result: result["ticket_number"])
+
+@workflow(name="it_support_sharded_workflow")
+def it_support_sharded_workflow(ctx: DaprWorkflowContext, params: dict):
+    tickets = params["tickets"]
+    shard_size = params.get("shard_size", 50)
+    max_parallel_shards = params.get("max_parallel_shards", 4)
+
+    # Each shard runs as its own child workflow, so the parent history only
+    # holds two events per shard instead of several per ticket
+    shards = [
+        {
+            "tickets": tickets[start:start + shard_size],
+            "ticket_offset": start,
+            "max_classifying": params.get("max_classifying", 20),
+            "max_per_category": params.get("max_per_category", 5),
+        }
+        for start in range(0, len(tickets), shard_size)
+    ]
+    console.info(f"Split {len(tickets)} tickets into {len(shards)} shards of up to {shard_size}")
+
+    results = []
+    for first in range(0, len(shards), max_parallel_shards):
+        shard_results = yield when_all([
+            ctx.call_child_workflow(
+                it_support_parallel_batch_workflow,
+                input=shard,
+                instance_id=f"{ctx.instance_id}-shard-{shard_no}"
+            )
+            for shard_no, shard in enumerate(shards[first:first + max_parallel_shards], start=first)
+        ])
+        for shard_result in shard_results:
+            results.extend(shard_result)
+
+    return results
+
+def extract_content(response):
+    """Unwrap the content of an LLM response object, if it is one"""
+    return response.content if hasattr(response, 'content') else response
+
+def print_ticket_response(idx: int, qtype: QueryType, resp: str):
+    # print to console for visibility
+    print("\n" + "*" * 60)
+    print(f"TICKET #{idx} RESPONSE ({qtype.upper()}):")
+    print(resp)
+    print("*" * 60 + "\n")
+
 # 4) Tasks
 
 @task(description="""
@@ -115,12 +208,25 @@ def handle_network(query: str) -> str:
 def handle_other(query: str) -> str:
     pass  # implemented by the LLM
 
+HANDLERS = {
+    QueryType.HARDWARE: handle_hardware,
+    QueryType.SOFTWARE: handle_software,
+    QueryType.NETWORK:  handle_network,
+    QueryType.OTHER:    handle_other,
+}
+
 # 5) Run through a handful of sample tickets
 def main():
     load_dotenv()
     logging.basicConfig(level=logging.INFO)
 
-    wfapp = WorkflowApp()
+    # Repeated tickets are answered from the response cache instead of the LLM.
+    # Use WorkflowApp() to send every task to the LLM.
+    wfapp = WorkflowApp(
+        llm=CachedChatClient(
+            cache=ResponseCache(store_name="responsecache", ttl_seconds=3600, max_entries=1000)
+        )
+    )
 
     sample_tickets = [
         "My laptop won’t power on after the update.",
@@ -131,11 +237,17 @@ def main():
 
     console.info("Starting IT Support Ticket Processing...")
     
-    # Process all tickets in a single workflow execution
+    # Process all tickets in a single workflow execution: classify tickets
+    # concurrently and hand each one to its category's handler as soon as it
+    # is classified, with bounded concurrency for both steps.
+    # Use it_support_batch_workflow with input=sample_tickets to process
+    # the tickets one at a time instead, or it_support_sharded_workflow with
+    # input={"tickets": ..., "shard_size": 50} for very large batches.
     results = wfapp.run_and_monitor_workflow_sync(
-        it_support_batch_workflow,
-        input=sample_tickets
+        it_support_parallel_batch_workflow,
+        input={"tickets": sample_tickets, "max_classifying": 20, "max_per_category": 5}
     )
+    console.info(f"Response cache stats: {wfapp.llm.cache.stats()}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
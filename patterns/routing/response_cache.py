@@ -0,0 +1,405 @@
+"""
+Opt-in response cache for WorkflowApp LLM-backed tasks.
+
+Tasks whose body is `pass` are rendered into a prompt and sent to the
+WorkflowApp's LLM client. Passing a `CachedChatClient` as the WorkflowApp's
+`llm` puts a two-tier cache in front of those calls:
+
+1. Exact match - keyed on the rendered messages, model and response_format
+2. Semantic match - cosine similarity between prompt embeddings (optional)
+
+Entries, each with its prompt embedding, are stored in a Dapr state store
+so they are shared across replicas and expire after a TTL. A small index
+record in the same store lists the live keys with their namespace and last
+use, updated with ETag concurrency, so every replica sees and evicts the
+same entries beyond `max_entries`. Each replica loads the embeddings of new
+entries once into a local LSH index, so a semantic lookup only compares
+against the few entries that hash near the prompt.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dapr.clients import DaprClient
+from dapr.clients.exceptions import DaprGrpcError
+from dapr.clients.grpc._state import Concurrency, StateOptions
+from dapr_agents import OpenAIChatClient
+from dapr_agents.types import LLMChatResponse
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Exact-match and embedding-similarity cache backed by a Dapr state store."""
+
+    def __init__(
+        self,
+        store_name: str,
+        ttl_seconds: int = 3600,
+        max_entries: int = 1000,
+        embedder: Optional[Callable[[str], List[float]]] = None,
+        similarity_threshold: float = 0.95,
+        key_prefix: str = "response-cache",
+        index_refresh_seconds: float = 30,
+        index_retries: int = 5,
+    ):
+        self.store_name = store_name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.key_prefix = key_prefix
+        self.index_refresh_seconds = index_refresh_seconds
+        self.index_retries = index_retries
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._client: Optional[DaprClient] = None
+        # Local copy of the shared index: key -> [namespace id, created_at, last_used]
+        self._index: Dict[str, list] = {}
+        self._index_loaded_at = 0.0
+        # Keys used or written here since the last index write
+        self._dirty: set = set()
+        # Embeddings of the indexed entries, for semantic matches
+        self._vectors = LSHIndex()
+
+    @property
+    def client(self) -> DaprClient:
+        """One gRPC channel to the sidecar for the life of the cache"""
+        with self._lock:
+            if self._client is None:
+                self._client = DaprClient()
+            return self._client
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def get(self, prompt: str, namespace: str) -> Optional[Any]:
+        """Return the cached response for a prompt, or None on a miss"""
+        key = self._key(prompt, namespace)
+        entry = self._load(key)
+        if entry is not None:
+            self._record("hits")
+            self._touch(key, namespace, entry)
+            return entry["response"]
+
+        if self.embedder is not None:
+            self._refresh_index()
+            match = self._vectors.nearest(self._embed(prompt), namespace_id(namespace), self.similarity_threshold)
+            if match is not None:
+                entry = self._load(match)
+                if entry is not None:
+                    self._record("semantic_hits")
+                    self._touch(match, namespace, entry)
+                    return entry["response"]
+
+        self._record("misses")
+        return None
+
+    def put(self, prompt: str, namespace: str, response: Any):
+        """Store a response for a prompt and evict the least recently used entries"""
+        key = self._key(prompt, namespace)
+        embedding = self._embed(prompt) if self.embedder is not None else None
+        entry = {"response": response, "embedding": embedding, "created_at": time.time()}
+        self.client.save_state(
+            store_name=self.store_name,
+            key=key,
+            value=json.dumps(entry),
+            state_metadata={"ttlInSeconds": str(self.ttl_seconds)},
+        )
+        self._touch(key, namespace, entry)
+        if embedding is not None:
+            self._vectors.add(key, namespace_id(namespace), embedding)
+        self._sync_index()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, semantic_hits, misses = self.hits, self.semantic_hits, self.misses
+        lookups = hits + semantic_hits + misses
+        return {
+            "hits": hits,
+            "semantic_hits": semantic_hits,
+            "misses": misses,
+            "hit_rate": (hits + semantic_hits) / lookups if lookups else 0.0,
+        }
+
+    def _record(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _key(self, prompt: str, namespace: str) -> str:
+        digest = hashlib.sha256(f"{namespace}\n{prompt}".encode("utf-8")).hexdigest()
+        return f"{self.key_prefix}||{digest}"
+
+    @property
+    def _index_key(self) -> str:
+        return f"{self.key_prefix}||index"
+
+    def _load(self, key: str) -> Optional[dict]:
+        data = self.client.get_state(store_name=self.store_name, key=key).data
+        entry = json.loads(data) if data else None
+        # Not every state store honours ttlInSeconds, so check it here too
+        if entry is None or time.time() - entry["created_at"] > self.ttl_seconds:
+            with self._lock:
+                self._index.pop(key, None)
+                self._dirty.discard(key)
+            self._vectors.remove(key)
+            return None
+        return entry
+
+    def _touch(self, key: str, namespace: str, entry: dict):
+        # Recency of hits reaches the shared index with the next put
+        with self._lock:
+            self._index[key] = [namespace_id(namespace), entry["created_at"], time.time()]
+            self._dirty.add(key)
+
+    def _read_index(self) -> Tuple[Dict[str, list], Optional[str]]:
+        response = self.client.get_state(store_name=self.store_name, key=self._index_key)
+        return (json.loads(response.data) if response.data else {}), (response.etag or None)
+
+    def _merge(self, stored: Dict[str, list]) -> Dict[str, list]:
+        """Combine the shared index with local changes, keeping the latest use of each key"""
+        with self._lock:
+            merged = dict(stored)
+            # Only keys used here are merged, so entries other replicas evicted stay evicted
+            for key in self._dirty:
+                meta = self._index.get(key)
+                if meta is not None and (key not in merged or merged[key][2] < meta[2]):
+                    merged[key] = meta
+        return merged
+
+    def _refresh_index(self):
+        if time.time() - self._index_loaded_at < self.index_refresh_seconds:
+            return
+        stored, _ = self._read_index()
+        merged = self._merge(stored)
+        with self._lock:
+            self._index = merged
+            self._index_loaded_at = time.time()
+        self._sync_vectors(merged)
+
+    def _sync_vectors(self, index: Dict[str, list]):
+        """Load embeddings of entries other replicas added, and forget evicted ones"""
+        for key in self._vectors.keys() - index.keys():
+            self._vectors.remove(key)
+        new = [key for key in index if key not in self._vectors]
+        for start in range(0, len(new), 100):
+            items = self.client.get_bulk_state(store_name=self.store_name, keys=new[start:start + 100]).items
+            for item in items:
+                entry = json.loads(item.data) if item.data else None
+                if entry and entry.get("embedding"):
+                    self._vectors.add(item.key, index[item.key][0], entry["embedding"])
+
+    def _sync_index(self):
+        """Write local changes to the shared index and evict beyond max_entries"""
+        for _ in range(self.index_retries):
+            stored, etag = self._read_index()
+            merged = self._merge(stored)
+            now = time.time()
+            expired = [k for k, meta in merged.items() if now - meta[1] > self.ttl_seconds]
+            for key in expired:
+                del merged[key]
+            by_recency = sorted(merged, key=lambda k: merged[k][2])
+            evicted = by_recency[:max(0, len(merged) - self.max_entries)]
+            for key in evicted:
+                del merged[key]
+            try:
+                # First write wins; a concurrent update makes us merge and try again
+                self.client.save_state(
+                    store_name=self.store_name,
+                    key=self._index_key,
+                    value=json.dumps(merged),
+                    etag=etag,
+                    options=StateOptions(concurrency=Concurrency.first_write),
+                )
+            except DaprGrpcError as error:
+                logger.debug("Response cache index changed concurrently, retrying: %s", error)
+                continue
+            for key in evicted:
+                self.client.delete_state(store_name=self.store_name, key=key)
+            with self._lock:
+                self._index = merged
+                self._index_loaded_at = now
+                self._dirty.clear()
+            if self.embedder is not None:
+                self._sync_vectors(merged)
+            return
+        logger.warning("Could not update the shared response cache index after %d attempts", self.index_retries)
+
+    def _embed(self, text: str) -> List[float]:
+        embedding = self.embedder(text)
+        # Embedders return a list of vectors when given a list, a vector otherwise
+        if embedding and isinstance(embedding[0], list):
+            embedding = embedding[0]
+        return list(embedding)
+
+
+
+class LSHIndex:
+    """
+    In-memory random-hyperplane LSH index for cosine similarity.
+
+    Each vector is filed under one `bits`-bit signature in each of `tables`
+    tables; a query is only compared exactly against the vectors sharing a
+    signature with it in some table. With the defaults, vectors with a
+    cosine similarity of 0.95 share a bucket in at least one table about
+    99% of the time.
+    """
+
+    def __init__(self, tables: int = 6, bits: int = 6, seed: int = 0):
+        self.tables = tables
+        self.bits = bits
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._planes: List[List[List[float]]] = []
+        # key -> (namespace id, vector, signatures)
+        self._vectors: Dict[str, Tuple[str, List[float], List[int]]] = {}
+        # (table, namespace id, signature) -> keys
+        self._buckets: Dict[Tuple[int, str, int], set] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._vectors
+
+    def keys(self) -> set:
+        with self._lock:
+            return set(self._vectors)
+
+    def add(self, key: str, namespace: str, vector: List[float]):
+        with self._lock:
+            self._remove(key)
+            signatures = self._signatures(vector)
+            self._vectors[key] = (namespace, vector, signatures)
+            for table, signature in enumerate(signatures):
+                self._buckets.setdefault((table, namespace, signature), set()).add(key)
+
+    def remove(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def nearest(self, vector: List[float], namespace: str, threshold: float) -> Optional[str]:
+        """The most similar key in the namespace at or above threshold, if any"""
+        with self._lock:
+            candidates = set()
+            for table, signature in enumerate(self._signatures(vector)):
+                candidates |= self._buckets.get((table, namespace, signature), set())
+            stored = [(key, self._vectors[key][1]) for key in candidates]
+        best_key, best_score = None, threshold
+        for key, other in stored:
+            score = cosine_similarity(vector, other)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _remove(self, key: str):
+        if key not in self._vectors:
+            return
+        namespace, _, signatures = self._vectors.pop(key)
+        for table, signature in enumerate(signatures):
+            bucket = self._buckets.get((table, namespace, signature))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[(table, namespace, signature)]
+
+    def _signatures(self, vector: List[float]) -> List[int]:
+        if not self._planes or len(self._planes[0][0]) != len(vector):
+            # Fixed hyperplanes, so every replica files a vector under the same buckets
+            rng = random.Random(self.seed)
+            self._planes = [
+                [[rng.gauss(0, 1) for _ in vector] for _ in range(self.bits)] for _ in range(self.tables)
+            ]
+            self._buckets.clear()
+            self._vectors.clear()
+        signatures = []
+        for planes in self._planes:
+            signature = 0
+            for plane in planes:
+                signature = signature << 1 | (sum(p * x for p, x in zip(plane, vector)) >= 0)
+            signatures.append(signature)
+        return signatures
+
+
+def namespace_id(namespace: str) -> str:
+    return hashlib.sha256(namespace.encode("utf-8")).hexdigest()[:12]
+
+
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class CachedChatClient(OpenAIChatClient):
+    """OpenAIChatClient that serves repeated task prompts from a ResponseCache."""
+
+    cache: Optional[Any] = Field(default=None, exclude=True, description="ResponseCache to read and write")
+
+    def generate(self, messages=None, *, response_format=None, tools=None, stream=False, structured_mode="json", **kwargs):
+        # Streaming and tool calling are not deterministic prompt -> response pairs
+        if self.cache is None or stream or tools:
+            return super().generate(
+                messages, response_format=response_format, tools=tools, stream=stream,
+                structured_mode=structured_mode, **kwargs
+            )
+
+        prompt = render_messages(messages, kwargs.get("input_data"))
+        namespace = self._namespace(response_format, structured_mode, kwargs)
+        cached = self.cache.get(prompt, namespace)
+        if cached is not None:
+            logger.info("Response cache hit (%s)", namespace)
+            if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+                return response_format.model_validate(cached)
+            return LLMChatResponse.model_validate(cached)
+
+        response = super().generate(
+            messages, response_format=response_format, structured_mode=structured_mode, **kwargs
+        )
+        if isinstance(response, BaseModel):
+            self.cache.put(prompt, namespace, response.model_dump(mode="json"))
+        return response
+
+    def _namespace(self, response_format, structured_mode: str, kwargs: dict) -> str:
+        """Everything besides the prompt that shapes the response: model, format and request settings"""
+        settings = {
+            # temperature, top_p, max_tokens and any other request parameters
+            "params": {k: v for k, v in kwargs.items() if k not in ("model", "input_data")},
+            "structured_mode": structured_mode if response_format is not None else None,
+        }
+        if getattr(self, "prompty", None) is not None:
+            settings["prompty"] = self.prompty.model.parameters.model_dump()
+        if kwargs.get("input_data") is not None:
+            # input_data is rendered through this client's prompt template
+            settings["prompt_template"] = str(getattr(self, "prompt_template", None))
+        digest = hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+        return f"{kwargs.get('model') or self.model}|{format_name(response_format)}|{digest}"
+
+
+def render_messages(messages, input_data: Optional[dict] = None) -> str:
+    """Render str, dict or Message inputs, plus any prompt template inputs, into one stable string"""
+    if isinstance(messages, str) and input_data is None:
+        return messages
+    if isinstance(messages, str):
+        rendered = messages
+    else:
+        rendered = [m.model_dump() if isinstance(m, BaseModel) else m for m in messages or []]
+    return json.dumps({"messages": rendered, "input_data": input_data}, sort_keys=True, default=str)
+
+
+def format_name(response_format) -> str:
+    if response_format is None:
+        return "text"
+    if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+        schema = json.dumps(response_format.model_json_schema(), sort_keys=True)
+        return f"{response_format.__name__}:{hashlib.sha256(schema.encode('utf-8')).hexdigest()[:12]}"
+    return str(response_format)
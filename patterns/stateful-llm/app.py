@@ -6,16 +6,19 @@ Demonstrates:
 2. Tool use - accessing book data
 3. LLM abstraction
 4. Durable execution as a workflow agent
+5. Token streaming over Server-Sent Events
 """
 
 import asyncio
 import logging
 from typing import List
 from pydantic import BaseModel, Field
-from dapr_agents import tool, DurableAgent
+from dapr_agents import tool
 from dapr_agents.memory import ConversationDaprStateMemory
 from dotenv import load_dotenv
 
+from streaming import StreamingDurableAgent
+
 # Define tool output model
 class BookRecommendation(BaseModel):
     title: str = Field(description="Book title")
@@ -47,7 +50,8 @@ def recommend_books(genre: str) -> List[BookRecommendation]:
 
 async def main():
     try:
-        book_agent = DurableAgent(
+        # A DurableAgent that also streams tokens and tool calls from its workflow on POST /stream
+        book_agent = StreamingDurableAgent(
             name="BookBuddy",
             role="Book Recommendation Assistant",
             goal="Help users discover great books and remember their genre preferences",
@@ -70,7 +74,6 @@ async def main():
 
         book_agent.as_service(port=8002)
         await book_agent.start()
-        print("BookBuddy Agent is running on port 8002")
 
     except Exception as e:
         print(f"Error starting BookBuddy service: {e}")
@@ -0,0 +1,190 @@
+"""
+Token streaming for a DurableAgent.
+
+`/start-workflow` only answers once the whole agent workflow has finished.
+`StreamingDurableAgent` runs the same ToolCallingWorkflow, so the workflow
+stays the durable record of every turn, but its LLM activity streams the
+completion and its tool activity reports each call and result. Both publish
+those events to an in-process `TokenBroker`, and the `POST /stream` route the
+agent adds to its own service starts the workflow and forwards the events,
+followed by the workflow's final output, as Server-Sent Events.
+
+Events are published by whichever replica runs the activity, so the stream
+is complete when the agent runs as a single replica (or clients are routed to
+the replica running their workflow); the final output always comes from the
+workflow itself.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from dapr_agents import DurableAgent
+from dapr_agents.agents.durableagent.state import DurableAgentMessage
+from dapr_agents.types import AgentError, AssistantMessage, UserMessage
+from dapr_agents.workflow.decorators import route, task
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBroker:
+    """Hands events published from workflow activity threads to SSE streams on the service's event loop"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def subscribe(self, instance_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(instance_id, []).append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, instance_id: str, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = [s for s in self._subscribers.get(instance_id, []) if s[1] is not queue]
+            if subscribers:
+                self._subscribers[instance_id] = subscribers
+            else:
+                self._subscribers.pop(instance_id, None)
+
+    def publish(self, instance_id: str, event: str, data: Dict[str, Any]):
+        # Activities run on the workflow worker's threads, not the service's event loop
+        with self._lock:
+            subscribers = list(self._subscribers.get(instance_id, []))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+
+class StreamingDurableAgent(DurableAgent):
+    """DurableAgent whose workflow activities publish tokens and tool calls as they happen"""
+
+    _broker: TokenBroker = PrivateAttr(default_factory=TokenBroker)
+    # Tool call ID -> workflow instance, so tool activities know which stream they belong to
+    _tool_call_instances: Dict[str, str] = PrivateAttr(default_factory=dict)
+
+    @route("/stream", method="POST")
+    async def stream(self, request: Request) -> StreamingResponse:
+        """Start the agent workflow for {"task": ...} and stream its events"""
+        body = await request.json()
+        instance_id = uuid.uuid4().hex
+        # Subscribe before scheduling, so the first tokens can't be missed
+        events = self._broker.subscribe(instance_id)
+        try:
+            if not self.wf_runtime_is_running:
+                self.start_runtime()
+            self.wf_client.schedule_new_workflow(
+                workflow=self.resolve_workflow(self._workflow_name), input=body, instance_id=instance_id
+            )
+        except Exception:
+            self._broker.unsubscribe(instance_id, events)
+            raise
+        logger.info(f"Started streaming workflow {instance_id}")
+        return StreamingResponse(self._forward(instance_id, events), media_type="text/event-stream")
+
+    async def _forward(self, instance_id: str, events: asyncio.Queue) -> AsyncIterator[str]:
+        completion = asyncio.create_task(self.monitor_workflow_state(instance_id))
+        try:
+            yield sse("workflow", {"workflow_instance_id": instance_id})
+            while True:
+                next_event = asyncio.create_task(events.get())
+                done, _ = await asyncio.wait({next_event, completion}, return_when=asyncio.FIRST_COMPLETED)
+                if next_event not in done:
+                    next_event.cancel()
+                    break
+                yield sse(*next_event.result())
+            while not events.empty():
+                yield sse(*events.get_nowait())
+
+            state = completion.result()
+            if state is None or state.runtime_status.name != "COMPLETED":
+                status = state.runtime_status.name if state is not None else "UNKNOWN"
+                yield sse("error", {"message": f"Workflow {instance_id} ended with status {status}"})
+            else:
+                yield sse("done", json.loads(state.serialized_output))
+        finally:
+            self._broker.unsubscribe(instance_id, events)
+            completion.cancel()
+
+    @task
+    async def generate_response(
+        self, instance_id: str, task: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Ask the LLM for the assistant's next message, publishing tokens as they arrive"""
+        messages: List[Dict[str, Any]] = self.construct_messages(task or {})
+        user_message = self.get_last_message_if_user(messages)
+        if task and user_message:
+            # Same bookkeeping as DurableAgent: the new user message goes to memory and workflow state
+            self.memory.add_message(UserMessage(content=user_message.get("content", "")))
+            msg_object = DurableAgentMessage(**dict(user_message)).model_dump(mode="json")
+            inst: dict = self.state["instances"][instance_id]
+            inst.setdefault("messages", []).append(msg_object)
+            inst["last_message"] = msg_object
+            self.state.setdefault("chat_history", []).append(msg_object)
+            self.save_state()
+
+        # A retried activity streams the turn again, so clients start it over
+        self._broker.publish(instance_id, "turn", {})
+        content_parts: List[str] = []
+        tool_calls: Dict[int, Dict[str, Any]] = {}
+        try:
+            chunks = self.llm.generate(
+                messages=messages,
+                tools=self.get_llm_tools(),
+                stream=True,
+                **({"tool_choice": self.tool_choice} if self.tool_choice is not None else {}),
+            )
+            for chunk in chunks:
+                delta = chunk.result
+                if delta.content:
+                    content_parts.append(delta.content)
+                    self._broker.publish(instance_id, "token", {"content": delta.content})
+                for tool_call in delta.tool_calls or []:
+                    call = tool_calls.setdefault(tool_call.index, {
+                        "id": tool_call.id,
+                        "type": "function",
+                        "function": {"name": "", "arguments": ""},
+                    })
+                    if tool_call.function.name:
+                        call["function"]["name"] = tool_call.function.name
+                    if tool_call.function.arguments:
+                        call["function"]["arguments"] += tool_call.function.arguments
+        except Exception as e:
+            logger.error(f"Error during chat generation: {e}")
+            raise AgentError(f"Failed during chat generation: {e}") from e
+
+        for call in tool_calls.values():
+            self._tool_call_instances[call["id"]] = instance_id
+        message = AssistantMessage(content="".join(content_parts), tool_calls=list(tool_calls.values()) or None)
+        return message.model_dump()
+
+    @task
+    async def run_tool(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a tool call, publishing the call and its result to the workflow's stream"""
+        instance_id = self._tool_call_instances.pop(tool_call["id"], None)
+        name = tool_call["function"]["name"]
+        if instance_id:
+            self._broker.publish(instance_id, "tool_call", {
+                "id": tool_call["id"], "name": name, "arguments": tool_call["function"].get("arguments", ""),
+            })
+        try:
+            result = await super().run_tool(tool_call)
+        except Exception as e:
+            if instance_id:
+                self._broker.publish(instance_id, "tool_error", {"id": tool_call["id"], "name": name, "message": str(e)})
+            raise
+        if instance_id:
+            self._broker.publish(instance_id, "tool_result", {
+                "id": tool_call["id"], "name": name, "content": result["execution_result"],
+            })
+        return result
+
+
+def sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"